@@ -0,0 +1,538 @@
+"""Local stand-ins for the chain RPCs, the Merkl API and the Relay API.
+
+Everything is served by one HTTP server so the simulated chains, Merkl and Relay share state:
+a claim tx marks the Merkl reward as claimed, a Relay deposit credits ETH on the destination
+chain once the fill delay has passed.
+
+    /rpc/<chain>[/<endpoint>]             JSON-RPC, single and batch requests, every endpoint sees the same chain
+    /merkl/v4/users/<address>/rewards     Merkl rewards
+    /merkl-app/transaction/claim          Merkl claim calldata
+    /relay/quote                          Relay quote
+    /relay/intents/status                 Relay fill status
+    /relay/requests/v2                    Relay request details
+    /__stats                              request counters
+
+Run standalone to point main.py at it by hand:
+
+    python -m benchmarks.mock_servers --port 8545
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import rlp
+from eth_abi import decode, encode
+from eth_account import Account as EthAccount
+from eth_utils import keccak, to_checksum_address
+
+from data.const import MERKL_DISTRIBUTER, MULTICALL3, SWELL, network_mapping
+
+RELAY_RECEIVER = to_checksum_address(keccak(text="relay receiver")[:20])
+
+CLAIM_SELECTOR = "71ee95c0"
+TRANSFER_SELECTOR = "a9059cbb"
+AGGREGATE3_SELECTOR = "82ad56cb"
+
+GAS_USED = {"claim": 120_000, "transfer": 52_000, "call": 21_000}
+
+
+class RpcError(Exception):
+    pass
+
+
+@dataclass
+class Faults:
+    """Added latency (seconds, +-50% jitter) and the share of requests answered with an HTTP 503."""
+
+    latency: float = 0.0
+    error_rate: float = 0.0
+
+    def apply(self) -> bool:
+        if self.latency:
+            time.sleep(self.latency * random.uniform(0.5, 1.5))
+
+        return random.random() < self.error_rate
+
+
+@dataclass
+class MockConfig:
+    block_time: float = 1.0
+    fill_delay: float = 3.0
+    eligible_ratio: float = 1.0
+    reward_amount: int = 1_000 * 10**18
+    unfunded_ratio: float = 0.3
+    funded_eth: int = 10**15
+    source_eth: int = 10**16
+    rpc: Faults = field(default_factory=Faults)
+    merkl: Faults = field(default_factory=Faults)
+    relay: Faults = field(default_factory=Faults)
+
+
+class MockWorld:
+    """State of every simulated chain plus the Merkl and Relay bookkeeping."""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.chain_names = {network.id: name for name, network in network_mapping.items()}
+        self.counters: Counter[str] = Counter()
+
+        self.eth: dict[str, dict[str, int]] = defaultdict(dict)
+        self.tokens: dict[str, dict[tuple[str, str], int]] = defaultdict(lambda: defaultdict(int))
+        self.claimed: dict[tuple[str, str], int] = defaultdict(int)
+        self.nonces: dict[str, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.txs: dict[str, dict[str, dict]] = defaultdict(dict)
+        self.relay_requests: dict[str, dict] = {}
+
+        self.start = time.monotonic()
+        self._lock = threading.RLock()
+
+    # Chain
+
+    def block_number(self) -> int:
+        return 100 + int((time.monotonic() - self.start) / self.config.block_time)
+
+    def eth_balance(self, chain: str, address: str) -> int:
+        address = address.lower()
+
+        if address not in self.eth[chain]:
+            # Deterministic per address, a share of the wallets needs a Swell refuel
+            unfunded = int.from_bytes(keccak(text=address)[:4], "big") / 2**32 < self.config.unfunded_ratio
+            if chain == "swell":
+                self.eth[chain][address] = 0 if unfunded else self.config.funded_eth
+            else:
+                self.eth[chain][address] = self.config.source_eth
+
+        return self.eth[chain][address]
+
+    def rpc(self, chain: str, method: str, params: list):
+        self.counters[f"rpc.{method}"] += 1
+        self.settle()
+
+        if method == "eth_chainId":
+            return hex(network_mapping[chain].id)
+        if method == "eth_blockNumber":
+            return hex(self.block_number())
+        if method == "eth_getBlockByNumber":
+            return {
+                "number": hex(self.block_number()),
+                "hash": "0x" + keccak(text=f"{chain}{self.block_number()}").hex(),
+                "baseFeePerGas": hex(1_000_000),
+                "extraData": "0x",
+                "transactions": [],
+            }
+        if method == "eth_maxPriorityFeePerGas":
+            return hex(100_000)
+        if method == "eth_gasPrice":
+            return hex(1_100_000)
+        if method == "eth_feeHistory":
+            blocks = int(params[0], 16) if isinstance(params[0], str) else params[0]
+            return {
+                "oldestBlock": hex(self.block_number() - blocks),
+                "baseFeePerGas": [hex(1_000_000)] * (blocks + 1),
+                "gasUsedRatio": [0.5] * blocks,
+                "reward": [[hex(100_000)] * len(params[2])] * blocks,
+            }
+        if method == "eth_getBalance":
+            return hex(self.eth_balance(chain, params[0]))
+        if method == "eth_getTransactionCount":
+            return hex(self.nonces[chain][params[0].lower()])
+        if method == "eth_estimateGas":
+            data = params[0].get("data", "0x")[2:10]
+            kind = {CLAIM_SELECTOR: "claim", TRANSFER_SELECTOR: "transfer"}.get(data, "call")
+            return hex(GAS_USED[kind])
+        if method == "eth_call":
+            return "0x" + self.call(chain, params[0]["to"], bytes.fromhex(params[0]["data"][2:])).hex()
+        if method == "eth_sendRawTransaction":
+            return self.send_raw_transaction(chain, bytes.fromhex(params[0][2:]))
+        if method == "eth_getTransactionReceipt":
+            return self.receipt(chain, params[0])
+        if method == "eth_getTransactionByHash":
+            tx = self.txs[chain].get(params[0])
+            return {"hash": params[0], "blockNumber": None} if tx else None
+
+        raise RpcError(f"the method {method} does not exist/is not available")
+
+    def call(self, chain: str, to: str, data: bytes) -> bytes:
+        selector, args = data[:4].hex(), data[4:]
+
+        if to.lower() == MULTICALL3.lower() and selector == AGGREGATE3_SELECTOR:
+            (calls,) = decode(["(address,bool,bytes)[]"], args)
+            return encode(["(bool,bytes)[]"], [[(True, self.call(chain, target, call)) for target, _, call in calls]])
+        if selector == "4d2301cc":  # getEthBalance(address)
+            (address,) = decode(["address"], args)
+            return encode(["uint256"], [self.eth_balance(chain, address)])
+        if selector == "70a08231":  # balanceOf(address)
+            (address,) = decode(["address"], args)
+            return encode(["uint256"], [self.tokens[chain][(to.lower(), address.lower())]])
+        if selector == "313ce567":  # decimals()
+            return encode(["uint8"], [18])
+        if selector == "95d89b41":  # symbol()
+            return encode(["string"], ["SWELL"])
+        if selector == "06fdde03":  # name()
+            return encode(["string"], ["Swell Governance Token"])
+
+        raise RpcError("execution reverted")
+
+    def send_raw_transaction(self, chain: str, raw: bytes) -> str:
+        tx_hash = "0x" + keccak(raw).hex()
+
+        if raw[0] == 2:
+            _, nonce, _, fee, gas, to, value, data, *_ = rlp.decode(raw[1:])
+        else:
+            nonce, fee, gas, to, value, data, *_ = rlp.decode(raw)
+
+        nonce, fee, gas, value = (int.from_bytes(item, "big") for item in (nonce, fee, gas, value))
+        sender = EthAccount.recover_transaction(raw).lower()
+        to = to_checksum_address(to) if to else None
+
+        with self._lock:
+            if tx_hash in self.txs[chain]:
+                raise RpcError("already known")
+
+            expected = self.nonces[chain][sender]
+            if nonce != expected:
+                too = "low" if nonce < expected else "high"
+                raise RpcError(f"nonce too {too}: next nonce {expected}, tx nonce {nonce}")
+
+            balance = self.eth_balance(chain, sender)
+            if balance < value + gas * fee:
+                raise RpcError("insufficient funds for gas * price + value")
+
+            kind, status = self.execute(chain, sender, to, value, data)
+            gas_used = min(gas, GAS_USED[kind])
+
+            self.nonces[chain][sender] += 1
+            self.eth[chain][sender] = self.eth_balance(chain, sender) - value - gas_used * fee
+            self.txs[chain][tx_hash] = {
+                "mined_at": time.monotonic() + self.config.block_time,
+                "status": status if gas >= GAS_USED[kind] else 0,
+                "gas_used": gas_used,
+                "fee": fee,
+                "from": sender,
+                "to": to,
+            }
+
+        return tx_hash
+
+    def execute(self, chain: str, sender: str, to: str | None, value: int, data: bytes) -> tuple[str, int]:
+        selector = data[:4].hex()
+
+        if to == to_checksum_address(MERKL_DISTRIBUTER) and selector == CLAIM_SELECTOR:
+            users, tokens, amounts, _ = decode(["address[]", "address[]", "uint256[]", "bytes32[][]"], data[4:])
+            for user, token, amount in zip(users, tokens, amounts):
+                key = (user.lower(), token.lower())
+                self.tokens[chain][(token.lower(), user.lower())] += amount - self.claimed[key]
+                self.claimed[key] = amount
+            return "claim", 1
+
+        if to and selector == TRANSFER_SELECTOR:
+            recipient, amount = decode(["address", "uint256"], data[4:])
+            balances = self.tokens[chain]
+            if balances[(to.lower(), sender)] < amount:
+                return "transfer", 0
+            balances[(to.lower(), sender)] -= amount
+            balances[(to.lower(), recipient.lower())] += amount
+            return "transfer", 1
+
+        if to == RELAY_RECEIVER and data.hex() in self.relay_requests:
+            self.relay_requests[data.hex()]["deposited_at"] = time.monotonic()
+        elif to:
+            self.eth[chain][to.lower()] = self.eth_balance(chain, to) + value
+
+        return "call", 1
+
+    def receipt(self, chain: str, tx_hash: str) -> dict | None:
+        tx = self.txs[chain].get(tx_hash)
+        if not tx or time.monotonic() < tx["mined_at"]:
+            return None
+
+        return {
+            "transactionHash": tx_hash,
+            "transactionIndex": "0x0",
+            "blockHash": "0x" + keccak(text=tx_hash).hex(),
+            "blockNumber": hex(self.block_number()),
+            "from": tx["from"],
+            "to": tx["to"],
+            "status": hex(tx["status"]),
+            "gasUsed": hex(tx["gas_used"]),
+            "cumulativeGasUsed": hex(tx["gas_used"]),
+            "effectiveGasPrice": hex(tx["fee"]),
+            "contractAddress": None,
+            "logs": [],
+            "logsBloom": "0x" + "00" * 256,
+            "type": "0x2",
+        }
+
+    def settle(self) -> None:
+        """Credit Relay fills whose delay has passed."""
+
+        now = time.monotonic()
+
+        with self._lock:
+            for request in self.relay_requests.values():
+                deposited_at = request["deposited_at"]
+                if deposited_at and not request["filled"] and now - deposited_at >= self.config.fill_delay:
+                    dest, recipient = request["dest_chain"], request["recipient"]
+                    self.eth[dest][recipient] = self.eth_balance(dest, recipient) + request["amount"]
+                    request["filled"] = True
+
+    # Merkl
+
+    def eligible(self, address: str) -> bool:
+        return int.from_bytes(keccak(text=f"merkl{address.lower()}")[:4], "big") / 2**32 < self.config.eligible_ratio
+
+    def merkl_rewards(self, address: str, chain_id: int) -> list:
+        self.counters["merkl.rewards"] += 1
+
+        if self.chain_names.get(chain_id) != "swell" or not self.eligible(address):
+            return []
+
+        amount = self.config.reward_amount
+        claimed = self.claimed[(address.lower(), SWELL.lower())]
+        token = {"address": SWELL, "chainId": chain_id, "symbol": "SWELL", "decimals": 18}
+
+        return [
+            {
+                "chain": {
+                    "id": chain_id,
+                    "name": "Swell",
+                    "icon": "https://icons.llamao.fi/icons/chains/rsz_swell.jpg",
+                    "Explorer": [
+                        {
+                            "id": "swell",
+                            "type": "BLOCKSCOUT",
+                            "url": "https://explorer.swellnetwork.io",
+                            "chainId": chain_id,
+                        }
+                    ],
+                },
+                "rewards": [
+                    {
+                        "root": "0x" + keccak(text="root").hex(),
+                        "recipient": address,
+                        "amount": str(amount),
+                        "claimed": str(claimed),
+                        "pending": "0",
+                        "proofs": ["0x" + keccak(text=f"{address}{i}").hex() for i in range(16)],
+                        "token": token,
+                        "breakdowns": [
+                            {
+                                "reason": f"SWELL_CAMPAIGN_{i}",
+                                "amount": str(amount // 20),
+                                "claimed": str(claimed // 20),
+                                "pending": "0",
+                                "campaignId": "0x" + keccak(text=f"campaign{i}").hex(),
+                            }
+                            for i in range(20)
+                        ],
+                    }
+                ],
+            }
+        ]
+
+    def merkl_claim(self, body: dict) -> dict:
+        self.counters["merkl.claim"] += 1
+
+        users, tokens, amounts, proofs = body["args"]
+        data = encode(
+            ["address[]", "address[]", "uint256[]", "bytes32[][]"],
+            [users, tokens, [int(amount) for amount in amounts], [[bytes.fromhex(p[2:]) for p in ps] for ps in proofs]],
+        )
+
+        return {"to": MERKL_DISTRIBUTER, "from": body["userAddress"], "data": "0x" + CLAIM_SELECTOR + data.hex()}
+
+    # Relay
+
+    def relay_quote(self, body: dict) -> dict:
+        self.counters["relay.quote"] += 1
+
+        with self._lock:
+            request_id = "0x" + keccak(text=f"{body['user']}{len(self.relay_requests)}{time.time()}").hex()
+            self.relay_requests[request_id[2:]] = {
+                "dest_chain": self.chain_names[body["destinationChainId"]],
+                "recipient": body["recipient"].lower(),
+                "amount": int(body["amount"]),
+                "deposited_at": None,
+                "filled": False,
+            }
+
+        currency = {
+            "chainId": body["originChainId"],
+            "address": "0x" + "00" * 20,
+            "symbol": "ETH",
+            "name": "Ether",
+            "decimals": 18,
+        }
+        amount = {
+            "currency": currency,
+            "amount": body["amount"],
+            "amountFormatted": str(int(body["amount"]) / 10**18),
+            "amountUsd": "0.30",
+            "minimumAmount": body["amount"],
+        }
+        impact = {"usd": "-0.01", "percent": "-0.2"}
+        slippage = {"usd": "0.00", "value": "0", "percent": "0.00"}
+
+        return {
+            "steps": [
+                {
+                    "id": "deposit",
+                    "action": "Confirm transaction in your wallet",
+                    "description": "Depositing funds to the relayer",
+                    "kind": "transaction",
+                    "items": [
+                        {
+                            "status": "incomplete",
+                            "data": {
+                                "from": body["user"],
+                                "to": RELAY_RECEIVER,
+                                "data": request_id,
+                                "value": body["amount"],
+                                "chainId": body["originChainId"],
+                                "gas": "30000",
+                                "maxFeePerGas": "3000000",
+                                "maxPriorityFeePerGas": "100000",
+                            },
+                            "check": {"endpoint": f"/intents/status?requestId={request_id}", "method": "GET"},
+                        }
+                    ],
+                    "requestId": request_id,
+                    "depositAddress": "",
+                }
+            ],
+            "fees": {key: amount for key in ("gas", "relayer", "relayerGas", "relayerService", "app")},
+            "details": {
+                "operation": "swap",
+                "sender": body["user"],
+                "recipient": body["recipient"],
+                "currencyIn": amount,
+                "currencyOut": amount,
+                "totalImpact": impact,
+                "swapImpact": impact,
+                "rate": "1",
+                "slippageTolerance": {"origin": slippage, "destination": slippage},
+                "timeEstimate": int(self.config.fill_delay),
+                "userBalance": "0",
+            },
+        }
+
+    def relay_status(self, request_id: str) -> dict:
+        self.counters["relay.status"] += 1
+        self.settle()
+
+        request = self.relay_requests.get(request_id.removeprefix("0x"))
+        if not request or not request["deposited_at"]:
+            return {"status": "waiting"}
+
+        return {"status": "success" if request["filled"] else "pending"}
+
+    def relay_request(self, request_id: str) -> dict:
+        self.counters["relay.requests"] += 1
+
+        request = self.relay_requests.get(request_id.removeprefix("0x"))
+        if not request or not request["filled"]:
+            return {"requests": []}
+
+        return {"requests": [{"data": {"metadata": {"currencyOut": {"amountUsd": "0.30"}}}}]}
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    world: MockWorld
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        parts = url.path.strip("/").split("/")
+
+        if url.path == "/__stats":
+            self.reply(dict(self.world.counters))
+        elif parts[:3] == ["merkl", "v4", "users"] and parts[-1] == "rewards":
+            self.serve(self.world.config.merkl, lambda: self.world.merkl_rewards(parts[3], int(query["chainId"])))
+        elif url.path == "/relay/intents/status":
+            self.serve(self.world.config.relay, lambda: self.world.relay_status(query["requestId"]))
+        elif url.path == "/relay/requests/v2":
+            self.serve(self.world.config.relay, lambda: self.world.relay_request(query["id"]))
+        else:
+            self.reply({"error": "not found"}, status=404)
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"null")
+        url = urlparse(self.path)
+
+        if url.path.startswith("/rpc/"):
+            chain = url.path.removeprefix("/rpc/").split("/")[0]
+            self.serve(self.world.config.rpc, lambda: self.json_rpc(chain, body))
+        elif url.path == "/merkl-app/transaction/claim":
+            self.serve(self.world.config.merkl, lambda: self.world.merkl_claim(body))
+        elif url.path == "/relay/quote":
+            self.serve(self.world.config.relay, lambda: self.world.relay_quote(body))
+        else:
+            self.reply({"error": "not found"}, status=404)
+
+    def json_rpc(self, chain: str, body: dict | list) -> dict | list:
+        if isinstance(body, list):
+            self.world.counters["rpc.batch"] += 1
+            return [self.json_rpc_one(chain, request) for request in body]
+
+        return self.json_rpc_one(chain, body)
+
+    def json_rpc_one(self, chain: str, request: dict) -> dict:
+        try:
+            result = self.world.rpc(chain, request["method"], request.get("params", []))
+            return {"jsonrpc": "2.0", "id": request["id"], "result": result}
+        except RpcError as e:
+            return {"jsonrpc": "2.0", "id": request["id"], "error": {"code": -32000, "message": str(e)}}
+
+    def serve(self, faults: Faults, handler) -> None:
+        if faults.apply():
+            self.world.counters["injected_errors"] += 1
+            self.reply({"error": "service unavailable"}, status=503)
+        else:
+            self.reply(handler())
+
+    def reply(self, payload, status: int = 200) -> None:
+        data = json.dumps(payload).encode()
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve(port: int, config: MockConfig) -> None:
+    handler = type("Handler", (MockHandler,), {"world": MockWorld(config)})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Mock chain RPC, Merkl and Relay servers")
+    parser.add_argument("--port", type=int, default=8545)
+    parser.add_argument("--block-time", type=float, default=1.0)
+    parser.add_argument("--fill-delay", type=float, default=3.0)
+    parser.add_argument("--latency", type=float, default=0.0, help="added latency of every endpoint, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with HTTP 503")
+    args = parser.parse_args()
+
+    faults = Faults(args.latency, args.error_rate)
+    config = MockConfig(block_time=args.block_time, fill_delay=args.fill_delay, rpc=faults, merkl=faults, relay=faults)
+
+    print(f"Serving on http://127.0.0.1:{args.port}")
+    serve(args.port, config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Parse time and peak allocations of Merkl rewards and Relay quote responses.
+
+Compares the old path (stdlib json.loads + full model) with the slim models parsed straight
+from bytes and with the full models on the same path (STRICT_RESPONSE_MODELS).
+
+    python -m benchmarks.parse_responses
+"""
+
+import json
+import os
+import time
+import tracemalloc
+from typing import Callable
+
+from models.responses.quote_response import QuoteResponse, SlimQuoteResponse
+from models.responses.rewards_response import RewardsResponse, SlimRewardsResponse
+
+ROUNDS = 200
+
+
+def hex_string(length: int = 64) -> str:
+    return "0x" + os.urandom(length // 2).hex()
+
+
+def rewards_payload(rewards: int = 5, proofs: int = 20, breakdowns: int = 200) -> bytes:
+    currency = {"chainId": 1923, "address": hex_string(40), "symbol": "SWELL", "decimals": 18}
+    payload = [
+        {
+            "chain": {
+                "id": 1923,
+                "name": "Swell",
+                "icon": "https://icons.llamao.fi/icons/chains/rsz_swell.jpg",
+                "Explorer": [
+                    {
+                        "id": hex_string(8),
+                        "type": "ETHERSCAN",
+                        "url": "https://explorer.swellnetwork.io",
+                        "chainId": 1923,
+                    }
+                ],
+            },
+            "rewards": [
+                {
+                    "root": hex_string(),
+                    "recipient": hex_string(40),
+                    "amount": "1234567890000000000000",
+                    "claimed": "0",
+                    "pending": "0",
+                    "proofs": [hex_string() for _ in range(proofs)],
+                    "token": currency,
+                    "breakdowns": [
+                        {
+                            "reason": f"SWELL_CAMPAIGN_{hex_string(40)}",
+                            "amount": "1000000000000000",
+                            "claimed": "0",
+                            "pending": "0",
+                            "campaignId": hex_string(),
+                        }
+                        for _ in range(breakdowns)
+                    ],
+                }
+                for _ in range(rewards)
+            ],
+        }
+    ]
+
+    return json.dumps(payload).encode()
+
+
+def quote_payload() -> bytes:
+    currency = {"chainId": 1, "address": "0x" + "0" * 40, "symbol": "ETH", "name": "Ether", "decimals": 18}
+    amount = {
+        "currency": currency,
+        "amount": "1000",
+        "amountFormatted": "0.000001",
+        "amountUsd": "0.003",
+        "minimumAmount": "1000",
+    }
+    impact = {"usd": "-0.01", "percent": "-0.2"}
+    slippage = {"usd": "0.00", "value": "0", "percent": "0.00"}
+
+    payload = {
+        "steps": [
+            {
+                "id": "deposit",
+                "action": "Confirm transaction in your wallet",
+                "description": "Depositing funds to the relayer",
+                "kind": "transaction",
+                "items": [
+                    {
+                        "status": "incomplete",
+                        "data": {
+                            "from": hex_string(40),
+                            "to": hex_string(40),
+                            "data": hex_string(),
+                            "value": "1000000000000000",
+                            "chainId": 1,
+                            "gas": "21064",
+                            "maxFeePerGas": "1000000000",
+                            "maxPriorityFeePerGas": "1000000",
+                        },
+                        "check": {"endpoint": f"/intents/status?requestId={hex_string()}", "method": "GET"},
+                    }
+                ],
+                "requestId": hex_string(),
+                "depositAddress": "",
+            }
+        ],
+        "fees": {key: amount for key in ("gas", "relayer", "relayerGas", "relayerService", "app")},
+        "details": {
+            "operation": "swap",
+            "sender": hex_string(40),
+            "recipient": hex_string(40),
+            "currencyIn": amount,
+            "currencyOut": amount,
+            "totalImpact": impact,
+            "swapImpact": impact,
+            "rate": "1",
+            "slippageTolerance": {"origin": slippage, "destination": slippage},
+            "timeEstimate": 4,
+            "userBalance": "1000000000000000000",
+        },
+    }
+
+    return json.dumps(payload).encode()
+
+
+def measure(parse: Callable[[], object]) -> tuple[float, int]:
+    parse()
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        parse()
+    elapsed = (time.perf_counter() - start) / ROUNDS
+
+    tracemalloc.start()
+    parse()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed, peak
+
+
+def main() -> None:
+    cases = {
+        "rewards": (rewards_payload(), RewardsResponse, SlimRewardsResponse),
+        "quote": (quote_payload(), QuoteResponse, SlimQuoteResponse),
+    }
+
+    for name, (raw, strict, slim) in cases.items():
+        print(f"{name} ({len(raw) / 1024:.0f} KiB)")
+
+        for label, parse in (
+            ("json.loads + full model", lambda: strict.model_validate(json.loads(raw))),
+            ("bytes -> full model", lambda: strict.model_validate_json(raw)),
+            ("bytes -> slim model", lambda: slim.model_validate_json(raw)),
+        ):
+            elapsed, peak = measure(parse)
+            print(f"  {label:<26} {elapsed * 1e6:>9.1f} us  {peak / 1024:>8.1f} KiB peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""Offline throughput benchmark of the check and claim flows.
+
+Starts the mock servers in a separate process, points settings at them and drives the real
+Pipeline -> Controller paths for N synthetic wallets. Reports wallets/min, p50/p99 latency per
+stage and the RPC, Merkl and Relay calls the servers received.
+
+    python -m benchmarks.run --wallets 100 --concurrency 10
+    python -m benchmarks.run --action check_swell --latency 0.05 --error-rate 0.01 --json result.json
+"""
+
+import argparse
+import asyncio
+import functools
+import importlib
+import json
+import math
+import multiprocessing
+import socket
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import defaultdict
+from typing import Callable
+
+from eth_utils import keccak, to_checksum_address
+
+import settings
+from benchmarks.mock_servers import Faults, MockConfig, serve
+from data.const import network_mapping
+
+# (class path, method, stage) timed around every call
+STAGES = [
+    ("modules.controller.Controller", "execute", "account"),
+    ("modules.planner.RefuelPlanner", "plan", "refuel_plan"),
+    ("modules.controller.Controller", "_refuel", "refuel"),
+    ("modules.merkl.Merkl", "get_rewards", "scan"),
+    ("modules.merkl.Merkl", "claim", "claim"),
+    ("modules.merkl.Merkl", "claim_and_transfer", "claim_transfer"),
+    ("modules.wallet.Wallet", "transfer_token", "transfer"),
+    ("modules.balances.BalanceService", "get_many", "balances"),
+]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_servers(port: int, config: MockConfig) -> multiprocessing.Process:
+    # A separate process, so the simulated chains don't compete with the client for the GIL
+    process = multiprocessing.get_context("spawn").Process(target=serve, args=(port, config), daemon=True)
+    process.start()
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.2):
+                return process
+        except OSError:
+            time.sleep(0.1)
+
+    process.terminate()
+    raise RuntimeError("Mock servers did not start")
+
+
+def fetch_stats(base_url: str) -> dict[str, int]:
+    with urllib.request.urlopen(f"{base_url}/__stats") as resp:
+        return json.load(resp)
+
+
+def configure(base_url: str, workdir: str, args: argparse.Namespace) -> None:
+    """Point settings at the mock servers. Runs before any module reads its settings defaults."""
+
+    settings.RPC_LIST = {
+        chain: [f"{base_url}/rpc/{chain}/{i}" for i in range(args.rpc_endpoints)] for chain in network_mapping
+    }
+    settings.MERKL_API_URL = f"{base_url}/merkl"
+    settings.MERKL_APP_URL = f"{base_url}/merkl-app"
+    settings.RELAY_API_URL = f"{base_url}/relay"
+
+    settings.USE_PROXY = False
+    settings.USE_PROXY_FOR_RPC = False
+    settings.SEND_TO_EXCHANGE = True
+    settings.SLEEP_BETWEEN_WALLETS = [0, 0]
+    settings.SLEEP_BETWEEN_ACTIONS = [0, 0]
+    settings.CONCURRENCY = args.concurrency
+    settings.REFUEL_SETTINGS["plan_ahead"] = not args.no_plan_ahead
+
+    settings.TOKEN_CACHE_PATH = f"{workdir}/tokens.json"
+    settings.MERKL_CACHE["path"] = f"{workdir}/merkl.sqlite"
+    settings.GAS_PROFILES["path"] = f"{workdir}/gas_profiles.json"
+    settings.RUN_JOURNAL.update(path=f"{workdir}/claim_journal.jsonl", resume=False)
+    settings.KEY_DERIVATION["index_path"] = None
+
+
+def instrument(timings: dict[str, list[float]]) -> None:
+    def timed(stage: str, method: Callable) -> Callable:
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                timings[stage].append(time.perf_counter() - start)
+
+        return wrapper
+
+    for class_path, name, stage in STAGES:
+        module_name, class_name = class_path.rsplit(".", 1)
+        cls = getattr(importlib.import_module(module_name), class_name)
+        setattr(cls, name, timed(stage, getattr(cls, name)))
+
+
+def synthetic_accounts(count: int, seed: int) -> list:
+    from models.account import Account
+    from modules.keys import derive_addresses
+
+    accounts = [
+        Account(
+            id=f"[{i}/{count}]",
+            private_key="0x" + keccak(text=f"key:{seed}:{i}").hex(),
+            proxy=None,
+            recipient=to_checksum_address(keccak(text=f"recipient:{seed}:{i}")[:20]),
+        )
+        for i in range(1, count + 1)
+    ]
+    derive_addresses(accounts, index=None)
+
+    return accounts
+
+
+def report(result: dict) -> None:
+    print(
+        f"\n{result['action']}: {result['wallets']} wallets in {result['elapsed']:.1f}s, "
+        f"{result['wallets_per_min']:.1f} wallets/min, {result['failed']} failed"
+    )
+    if "done" in result:
+        print(f"Journal: {result['done']} accounts done")
+
+    print(f"\n{'stage':<16}{'count':>7}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for stage, stats in result["stages"].items():
+        print(f"{stage:<16}{stats['count']:>7}{stats['p50_ms']:>10.1f}{stats['p99_ms']:>10.1f}{stats['max_ms']:>10.1f}")
+
+    print(f"\n{'server calls':<40}{'count':>7}")
+    for name, count in sorted(result["server_calls"].items()):
+        print(f"{name:<40}{count:>7}")
+
+    print(f"\nTime spent | {result['time_spent']}")
+
+    print(f"\n{'client rpc':<16}{'calls':>7}{'round trips':>13}")
+    for chain, stats in result["rpc_batches"].items():
+        print(f"{chain:<16}{stats['calls']:>7}{stats['round_trips']:>13}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline benchmark against local mock servers")
+    parser.add_argument("--action", choices=["claim_swell", "check_swell"], default="claim_swell")
+    parser.add_argument("--wallets", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=settings.CONCURRENCY)
+    parser.add_argument("--no-plan-ahead", action="store_true", help="refuel each account on its own")
+    parser.add_argument("--latency", type=float, default=0.02, help="added latency of every endpoint, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with HTTP 503")
+    parser.add_argument("--rpc-endpoints", type=int, default=1, help="RPC endpoints per chain")
+    parser.add_argument("--block-time", type=float, default=1.0)
+    parser.add_argument("--fill-delay", type=float, default=3.0, help="seconds until a Relay deposit is filled")
+    parser.add_argument("--unfunded-ratio", type=float, default=0.3, help="share of wallets that need a refuel")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the result to this file")
+    parser.add_argument("--verbose", action="store_true", help="keep the per-account logs")
+    args = parser.parse_args()
+
+    faults = Faults(args.latency, args.error_rate)
+    config = MockConfig(
+        block_time=args.block_time,
+        fill_delay=args.fill_delay,
+        unfunded_ratio=args.unfunded_ratio,
+        rpc=faults,
+        merkl=faults,
+        relay=faults,
+    )
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_servers(port, config)
+    workdir = tempfile.mkdtemp(prefix="swell-bench-")
+
+    configure(base_url, workdir, args)
+
+    from modules.journal import journal
+    from modules.logger import logger
+    from modules.metrics import metrics
+    from modules.pipeline import Pipeline
+    from modules.rpc_batch import RpcBatch
+
+    logger.remove()
+    logger.add(sys.stderr, level="DEBUG" if args.verbose else "WARNING", format="{time:HH:mm:ss} | {message}")
+
+    timings: dict[str, list[float]] = defaultdict(list)
+    instrument(timings)
+    accounts = synthetic_accounts(args.wallets, args.seed)
+
+    pipeline = Pipeline(accounts, args.action, concurrency=args.concurrency)
+    start = time.perf_counter()
+    asyncio.run(pipeline.run())
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "action": args.action,
+        "wallets": args.wallets,
+        "concurrency": args.concurrency,
+        "elapsed": elapsed,
+        "wallets_per_min": pipeline.processed / (elapsed / 60),
+        "failed": pipeline.failed,
+        "stages": {
+            stage: {
+                "count": len(values),
+                "p50_ms": percentile(values, 50) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "max_ms": max(values) * 1000,
+            }
+            for stage, values in timings.items()
+        },
+        "server_calls": fetch_stats(base_url),
+        "rpc_batches": {chain: dict(stats) for chain, stats in RpcBatch.stats.items()},
+        "time_spent": metrics.summary_line(),
+        "metrics": metrics.snapshot(),
+    }
+
+    if args.action == "claim_swell":
+        result["done"] = sum(journal.is_done(account.address) for account in accounts)
+
+    server.terminate()
+    report(result)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,8 @@
 import json
-
-import questionary
+from functools import cache
 
 from models.network import Network
 
-style = questionary.Style(
-    [
-        ("qmark", "fg:#47A6F9 bold"),
-        ("pointer", "fg:#47A6F9 bold"),
-        ("highlighted", "fg:#808080"),
-        ("answer", "fg:#808080"),
-        ("instruction", "fg:#808080 italic"),
-    ]
-)
-
 ethereum = Network(
     name="ethereum",
     explorer="https://etherscan.io",
@@ -76,5 +65,41 @@ MERKL_DISTRIBUTER = "0x3Ef3D8bA38EBe18DB133cEc108f4D14CE00Dd9Ae"
 
 SWELL = "0x2826D136F5630adA89C1678b64A61620Aab77Aea"
 
-with open("data/abi/ERC20.json") as f:
-    ERC20_ABI = json.load(f)
+MULTICALL3 = "0xcA11bde05977b3631167028862bE2a173976CA11"
+
+ABI_PATHS = {
+    "ERC20_ABI": "data/abi/ERC20.json",
+    "MULTICALL3_ABI": "data/abi/Multicall3.json",
+    "MERKL_DISTRIBUTER_ABI": "data/abi/MerklDistributor.json",
+}
+
+
+@cache
+def load_abi(path: str) -> list:
+    with open(path) as f:
+        return json.load(f)
+
+
+@cache
+def get_style():
+    import questionary
+
+    return questionary.Style(
+        [
+            ("qmark", "fg:#47A6F9 bold"),
+            ("pointer", "fg:#47A6F9 bold"),
+            ("highlighted", "fg:#808080"),
+            ("answer", "fg:#808080"),
+            ("instruction", "fg:#808080 italic"),
+        ]
+    )
+
+
+def __getattr__(name: str):
+    # ABIs and the questionary style are built on first use instead of at import time
+    if name in ABI_PATHS:
+        return load_abi(ABI_PATHS[name])
+    if name == "style":
+        return get_style()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
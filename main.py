@@ -1,19 +1,52 @@
-import questionary
-from questionary import Choice
+import time
 
-import settings
-from data.const import style
-from modules.controller import Controller
-from modules.logger import logger
-from modules.utils import get_accounts, sleep
+START = time.perf_counter()
+
+import argparse  # noqa: E402
+import asyncio  # noqa: E402
+
+import settings  # noqa: E402
+from modules.logger import logger  # noqa: E402
+
+ACTIONS = {
+    "claim": "claim_swell",
+    "check": "check_swell",
+    "balances": "check_balances",
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Claim Swell rewards from Merkl")
+    parser.add_argument("action", nargs="?", choices=ACTIONS, help="run without the interactive menu")
+    parser.add_argument("--keys", default=settings.KEYS_PATH, help="private keys file")
+    parser.add_argument("--proxies", default=settings.PROXIES_PATH, help="proxies file")
+    parser.add_argument("--recipients", default=settings.RECIPIENTS_PATH, help="exchange deposit addresses file")
+    parser.add_argument("--offset", type=int, default=0, help="skip this many keys of the keys file")
+    parser.add_argument("--limit", type=int, default=None, help="process at most this many keys")
+    parser.add_argument("--concurrency", type=int, default=settings.CONCURRENCY, help="accounts processed at once")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        default=settings.RUN_JOURNAL["resume"],
+        help="skip accounts an interrupted claim run already finished",
+    )
+
+    return parser.parse_args()
 
 
 def get_action() -> str:
+    # questionary pulls in prompt_toolkit, only the interactive menu needs it
+    import questionary
+    from questionary import Choice
+
+    from data.const import style
+
     action = questionary.select(
         "Select action",
         choices=[
             Choice("Claim Swell rewards", value="claim_swell"),
             Choice("Check Swell rewards", value="check_swell"),
+            Choice("Check balances", value="check_balances"),
             Choice("Exit", value="exit"),
         ],
         style=style,
@@ -25,17 +58,42 @@ def get_action() -> str:
     return action
 
 
+def log_startup_time() -> None:
+    startup_ms = (time.perf_counter() - START) * 1000
+    logger.debug(f"Started in {startup_ms:.0f} ms")
+
+    if startup_ms > settings.STARTUP_BUDGET_MS:
+        logger.warning(f"Startup took {startup_ms:.0f} ms, over the {settings.STARTUP_BUDGET_MS} ms budget")
+
+
 def main():
-    accounts = get_accounts()
-    action = get_action()
+    args = parse_args()
+    action = ACTIONS[args.action] if args.action else get_action()
+
+    from modules.accounts import get_accounts, iter_accounts
+
+    if action == "check_balances":
+        from modules.balances import check_balances
+
+        accounts = get_accounts(args.keys, args.proxies, args.recipients, args.offset, args.limit)
+        runner = lambda: check_balances(accounts)  # noqa: E731
+    else:
+        from modules.pipeline import Pipeline
+
+        accounts = iter_accounts(args.keys, args.proxies, args.recipients, args.offset, args.limit)
+        pipeline = Pipeline(accounts, action, concurrency=args.concurrency, resume=args.resume)
+        runner = lambda: asyncio.run(pipeline.run())  # noqa: E731
+
+    if args.action:
+        log_startup_time()
 
-    for index, account in enumerate(accounts, start=1):
-        controller = Controller(account, action)
-        controller.execute()
+    from modules.metrics import metrics
 
-        if index < len(accounts):
-            sleep(*settings.SLEEP_BETWEEN_WALLETS)
+    with metrics.live():
+        runner()
 
+    logger.info(f"Time spent | {metrics.summary_line()}")
+    metrics.export()
     logger.success("All done! 🎉")
 
 
@@ -6,3 +6,4 @@ class Account(BaseModel):
     private_key: str
     proxy: str | None
     recipient: str | None
+    address: str | None = None
@@ -7,3 +7,5 @@ class ClaimResponse(BaseModel):
     to: Optional[str] = None
     from_: Optional[str] = Field(None, alias="from")
     data: Optional[str] = None
+    # Not part of the API response, the amount of each reward token the calldata claims
+    amounts: dict[str, int] = {}
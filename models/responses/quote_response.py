@@ -3,29 +3,53 @@ from typing import Optional
 from pydantic import BaseModel, Field
 
 
-class Data(BaseModel):
-    from_: str = Field(..., alias="from")
+# Slim models hold only the fields the refuel flow reads, the full models below extend them
+
+
+class SlimData(BaseModel):
     to: str
     data: str
     value: str
-    chainId: int
     gas: str
     maxFeePerGas: str
     maxPriorityFeePerGas: str
 
 
+class SlimItem(BaseModel):
+    data: SlimData
+
+
+class SlimStep(BaseModel):
+    items: list[SlimItem]
+    requestId: str
+
+
+class SlimDetails(BaseModel):
+    timeEstimate: int
+
+
+class SlimQuoteResponse(BaseModel):
+    steps: Optional[list[SlimStep]] = None
+    details: Optional[SlimDetails] = None
+
+
+class Data(SlimData):
+    from_: str = Field(..., alias="from")
+    chainId: int
+
+
 class Check(BaseModel):
     endpoint: str
     method: str
 
 
-class Item(BaseModel):
+class Item(SlimItem):
     status: str
     data: Data
     check: Check
 
 
-class Step(BaseModel):
+class Step(SlimStep):
     id: str
     action: str
     description: str
@@ -182,7 +206,7 @@ class SlippageTolerance(BaseModel):
     destination: Destination
 
 
-class Details(BaseModel):
+class Details(SlimDetails):
     operation: str
     sender: str
     recipient: str
@@ -196,7 +220,7 @@ class Details(BaseModel):
     userBalance: str
 
 
-class QuoteResponse(BaseModel):
+class QuoteResponse(SlimQuoteResponse):
     steps: Optional[list[Step]] = None
     fees: Optional[Fees] = None
     details: Optional[Details] = None
@@ -1,5 +1,28 @@
 from pydantic import BaseModel, RootModel
 
+# Slim models hold only the fields the claim flow reads, the full models below extend them
+
+
+class SlimToken(BaseModel):
+    address: str
+    symbol: str
+    decimals: int
+
+
+class SlimReward(BaseModel):
+    amount: str
+    claimed: str
+    proofs: list[str]
+    token: SlimToken
+
+
+class SlimModelItem(BaseModel):
+    rewards: list[SlimReward]
+
+
+class SlimRewardsResponse(RootModel):
+    root: list[SlimModelItem]
+
 
 class ExplorerItem(BaseModel):
     id: str
@@ -15,11 +38,8 @@ class Chain(BaseModel):
     Explorer: list[ExplorerItem]
 
 
-class Token(BaseModel):
-    address: str
+class Token(SlimToken):
     chainId: int
-    symbol: str
-    decimals: int
 
 
 class Breakdown(BaseModel):
@@ -30,21 +50,18 @@ class Breakdown(BaseModel):
     campaignId: str
 
 
-class Reward(BaseModel):
+class Reward(SlimReward):
     root: str
     recipient: str
-    amount: str
-    claimed: str
     pending: str
-    proofs: list[str]
     token: Token
     breakdowns: list[Breakdown]
 
 
-class ModelItem(BaseModel):
+class ModelItem(SlimModelItem):
     chain: Chain
     rewards: list[Reward]
 
 
-class RewardsResponse(RootModel):
+class RewardsResponse(SlimRewardsResponse):
     root: list[ModelItem]
@@ -0,0 +1,145 @@
+import random
+import re
+from itertools import islice
+from typing import Iterable, Iterator, TypeVar
+
+import settings
+from models.account import Account
+from modules.keys import derive_addresses
+from modules.proxies import proxy_manager
+
+T = TypeVar("T")
+
+PRIVATE_KEY_RE = re.compile(r"(0x)?[0-9a-fA-F]{64}")
+
+
+def iter_lines(path: str, prefix: str = "") -> Iterator[tuple[int, str]]:
+    """Non-empty lines of a file with their line numbers, read lazily."""
+
+    with open(path) as f:
+        for line_no, line in enumerate(f, start=1):
+            if line := line.strip():
+                yield line_no, prefix + line
+
+
+def cycle_lines(path: str, prefix: str = "", skip: int = 0) -> Iterator[str]:
+    """Non-empty lines of a file over and over again, starting `skip` lines in."""
+
+    while True:
+        empty = True
+
+        for _, line in iter_lines(path, prefix):
+            empty = False
+            if skip:
+                skip -= 1
+                continue
+            yield line
+
+        if empty:
+            raise ValueError(f"{path} is empty")
+
+
+def count_lines(path: str) -> int:
+    """Number of non-empty lines, counted on raw bytes without building str lines."""
+
+    with open(path, "rb") as f:
+        return sum(1 for line in f if not line.isspace())
+
+
+def window_shuffle(items: Iterable[T], window: int) -> Iterator[T]:
+    """Shuffle a stream by emitting a random item of a sliding buffer of `window` items."""
+
+    buffer = list(islice(items, window))
+
+    for item in items:
+        i = random.randrange(len(buffer))
+        yield buffer[i]
+        buffer[i] = item
+
+    random.shuffle(buffer)
+    yield from buffer
+
+
+def batched(items: Iterable[T], max_size: int) -> Iterator[list[T]]:
+    """Batches doubling in size up to `max_size`, so the first item is ready right away."""
+
+    items = iter(items)
+    size = 1
+
+    while batch := list(islice(items, size)):
+        yield batch
+        size = min(size * 2, max_size)
+
+
+def with_addresses(accounts: Iterable[Account]) -> Iterator[Account]:
+    for batch in batched(accounts, settings.KEY_DERIVATION["batch_size"]):
+        derive_addresses(batch)
+        yield from batch
+
+
+def iter_accounts(
+    keys_path: str = settings.KEYS_PATH,
+    proxies_path: str = settings.PROXIES_PATH,
+    recipients_path: str = settings.RECIPIENTS_PATH,
+    offset: int = 0,
+    limit: int | None = None,
+) -> Iterator[Account]:
+    """Stream accounts from the input files, validating each key as it is read.
+
+    `offset` and `limit` slice the keys file before shuffling, so a key file can be split
+    between runs. Memory stays bounded by the shuffle window and the derivation batch.
+    """
+
+    key_count = count_lines(keys_path)
+    total = max(0, key_count - offset)
+    total = total if limit is None else min(total, limit)
+
+    if settings.SEND_TO_EXCHANGE and key_count != count_lines(recipients_path):
+        # Checked up front so a mismatch fails before the first account starts
+        raise ValueError("Number of keys and recipients must be the same")
+
+    keys = islice(iter_lines(keys_path), offset, None if limit is None else offset + limit)
+
+    if settings.USE_PROXY:
+        proxy_manager.add(proxy for _, proxy in iter_lines(proxies_path, prefix="http://"))
+        proxies = cycle_lines(proxies_path, prefix="http://", skip=offset % max(1, count_lines(proxies_path)))
+    else:
+        proxies = None
+
+    if settings.SEND_TO_EXCHANGE:
+        recipients = (recipient for _, recipient in islice(iter_lines(recipients_path), offset, None))
+    else:
+        recipients = None
+
+    def records() -> Iterator[tuple[str, str | None, str | None]]:
+        for line_no, key in keys:
+            if not PRIVATE_KEY_RE.fullmatch(key):
+                raise ValueError(f"Invalid private key on line {line_no} of {keys_path}")
+
+            yield key, next(proxies) if proxies else None, next(recipients) if recipients else None
+
+    pairs = records()
+
+    if settings.SHUFFLE_KEYS:
+        if settings.SHUFFLE_WINDOW is None:
+            pairs = list(pairs)
+            random.shuffle(pairs)
+        else:
+            pairs = window_shuffle(pairs, settings.SHUFFLE_WINDOW)
+
+    accounts = (
+        Account(id=f"[{index}/{total}]", private_key=key, proxy=proxy, recipient=recipient)
+        for index, (key, proxy, recipient) in enumerate(pairs, start=1)
+    )
+
+    return with_addresses(accounts)
+
+
+def get_accounts(
+    keys_path: str = settings.KEYS_PATH,
+    proxies_path: str = settings.PROXIES_PATH,
+    recipients_path: str = settings.RECIPIENTS_PATH,
+    offset: int = 0,
+    limit: int | None = None,
+) -> list[Account]:
+    return list(iter_accounts(keys_path, proxies_path, recipients_path, offset, limit))
@@ -0,0 +1,85 @@
+from eth_abi import decode, encode
+from eth_typing import ChecksumAddress
+from web3 import Web3
+
+import settings
+from data.const import MULTICALL3, MULTICALL3_ABI, SWELL, network_mapping
+from models.account import Account
+from models.network import Network
+from modules.keys import get_address
+from modules.logger import logger
+from modules.pool import get_web3
+from modules.rpc_batch import RpcBatch
+from modules.utils import ether
+
+BALANCE_OF = bytes.fromhex("70a08231")
+GET_ETH_BALANCE = bytes.fromhex("4d2301cc")
+DECIMALS = bytes.fromhex("313ce567")
+
+
+class BalanceService:
+    """Batched balance reads for one chain.
+
+    Native and ERC-20 balances for any number of addresses are packed into Multicall3
+    `aggregate3` calls of up to `batch_size` reads each.
+    """
+
+    def __init__(self, chain_name: str, batch_size: int = settings.MULTICALL_BATCH_SIZE):
+        self.chain: Network = network_mapping[chain_name]
+        self.w3 = get_web3(chain_name)
+        self.multicall = self.w3.eth.contract(address=MULTICALL3, abi=MULTICALL3_ABI)
+        self.batch_size = batch_size
+
+    def get_many(self, reads: list[tuple[str, str]]) -> list[int]:
+        """Return balances for (address, token_address) pairs, an empty token address means native ETH."""
+
+        calls = [self._balance_call(address, token_address) for address, token_address in reads]
+        results = []
+
+        for i in range(0, len(calls), self.batch_size):
+            results += self._aggregate(calls[i : i + self.batch_size])
+
+        return [decode(["uint256"], data)[0] for data in results]
+
+    def get_balances(self, addresses: list[str], token_address: str = "") -> dict[ChecksumAddress, int]:
+        addresses = [Web3.to_checksum_address(address) for address in addresses]
+        balances = self.get_many([(address, token_address) for address in addresses])
+
+        return dict(zip(addresses, balances))
+
+    def get_decimals(self, token_address: str) -> int:
+        (data,) = self._aggregate([(Web3.to_checksum_address(token_address), DECIMALS)])
+        return decode(["uint8"], data)[0]
+
+    def _balance_call(self, address: str, token_address: str) -> tuple[str, bytes]:
+        address = Web3.to_checksum_address(address)
+
+        if token_address:
+            return Web3.to_checksum_address(token_address), BALANCE_OF + encode(["address"], [address])
+
+        return MULTICALL3, GET_ETH_BALANCE + encode(["address"], [address])
+
+    def _aggregate(self, calls: list[tuple[str, bytes]]) -> list[bytes]:
+        # A raw eth_call skips web3's request middlewares, which add two eth_chainId calls per contract call
+        call3 = [(target, False, call_data) for target, call_data in calls]
+        call_data = self.multicall.encode_abi("aggregate3", [call3])
+        (data,) = RpcBatch(self.w3, self.chain.name).add_call(MULTICALL3, call_data).execute()
+        (results,) = decode(["(bool,bytes)[]"], bytes.fromhex(data.removeprefix("0x")))
+
+        return [return_data for _, return_data in results]
+
+
+def check_balances(accounts: list[Account]) -> None:
+    addresses = [get_address(account) for account in accounts]
+
+    swell = BalanceService("swell")
+    decimals = swell.get_decimals(SWELL)
+    swell_balances = swell.get_many([(address, SWELL) for address in addresses])
+    eth_balances = {"swell": swell.get_many([(address, "") for address in addresses])}
+
+    for chain in settings.REFUEL_SETTINGS["chains"]:
+        eth_balances[chain] = BalanceService(chain).get_many([(address, "") for address in addresses])
+
+    for i, (account, address) in enumerate(zip(accounts, addresses)):
+        chains = " | ".join(f"{chain.title()}: {ether(balances[i]):.6f} ETH" for chain, balances in eth_balances.items())
+        logger.info(f"{account.id} {address} | {swell_balances[i] / 10**decimals:.2f} SWELL | {chains}")
@@ -0,0 +1,139 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+from web3.contract import Contract
+
+import settings
+
+
+class JsonFileStore:
+    """A dict persisted as one JSON file, loaded on first use and replaced atomically on every save.
+
+    Subclasses call `_load` and `_save` while holding `_lock`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._data: dict[str, dict] | None = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict[str, dict]:
+        if self._data is None:
+            try:
+                with open(self.path) as f:
+                    self._data = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._data = {}
+
+        return self._data
+
+    def _save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class TokenMetadataCache(JsonFileStore):
+    """Token name, symbol and decimals per (chain_id, token address), persisted on disk.
+
+    These never change for a deployed token, so they are fetched once and reused by every run.
+    """
+
+    def __init__(self, path: str = settings.TOKEN_CACHE_PATH):
+        super().__init__(path)
+
+    def get(self, chain_id: int, address: str) -> dict | None:
+        with self._lock:
+            return self._load().get(self._key(chain_id, address))
+
+    def set(self, chain_id: int, address: str, metadata: dict) -> None:
+        with self._lock:
+            self._load()[self._key(chain_id, address)] = metadata
+            self._save()
+
+    def _key(self, chain_id: int, address: str) -> str:
+        return f"{chain_id}:{address.lower()}"
+
+
+class ContractCache:
+    """In-memory LRU of built web3 Contract objects."""
+
+    def __init__(self, max_size: int = settings.CONTRACT_CACHE_SIZE):
+        self.max_size = max_size
+        self._contracts: OrderedDict[tuple, Contract] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, factory: Callable[[], Contract]) -> Contract:
+        with self._lock:
+            if key in self._contracts:
+                self._contracts.move_to_end(key)
+                return self._contracts[key]
+
+            contract = self._contracts[key] = factory()
+            if len(self._contracts) > self.max_size:
+                self._contracts.popitem(last=False)
+
+            return contract
+
+
+class GasProfileStore(JsonFileStore):
+    """Gas limits learned from confirmed txs, per (chain_id, contract, selector, calldata size), persisted on disk.
+
+    Claims and transfers of a given shape use the same gas every time, so once `min_samples` of them
+    confirmed, the highest gasUsed seen plus `margin` replaces eth_estimateGas. A tx that runs out of
+    gas drops the profile of its shape, the next one is estimated again.
+    """
+
+    def __init__(self, gas_settings: dict = settings.GAS_PROFILES):
+        super().__init__(gas_settings["path"])
+        self.margin = gas_settings["margin"]
+        self.min_samples = gas_settings["min_samples"]
+
+    def key(self, chain_id: int, tx: dict) -> str | None:
+        if not tx.get("to"):
+            return None
+
+        data = tx.get("data") or "0x"
+        data = data if isinstance(data, str) else "0x" + bytes(data).hex()
+        # Calldata size captures the lengths of the dynamic arguments, e.g. the tokens and proofs of a claim
+        size = (len(data) - 2) // 2
+
+        return f"{chain_id}:{tx['to'].lower()}:{data[:10].lower()}:{size}:{int(bool(tx.get('value')))}"
+
+    def limit(self, key: str | None) -> int | None:
+        if key is None:
+            return None
+
+        with self._lock:
+            profile = self._load().get(key)
+
+        if not profile or profile["samples"] < self.min_samples:
+            return None
+
+        return int(profile["gas_used"] * (1 + self.margin))
+
+    def learn(self, key: str | None, gas_used: int) -> None:
+        if key is None:
+            return
+
+        with self._lock:
+            profile = self._load().setdefault(key, {"gas_used": 0, "samples": 0})
+            profile["gas_used"] = max(profile["gas_used"], gas_used)
+            profile["samples"] += 1
+            self._save()
+
+    def forget(self, key: str | None) -> None:
+        with self._lock:
+            if self._load().pop(key, None) is not None:
+                self._save()
+
+
+token_cache = TokenMetadataCache()
+contract_cache = ContractCache()
+gas_profiles = GasProfileStore()
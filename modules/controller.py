@@ -1,20 +1,38 @@
 import random
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
 
 import settings
 from data.const import SWELL
 from models.account import Account
+from modules.balances import BalanceService
+from modules.journal import CLAIMED, DONE, REFUELED, TRANSFERRED, journal
+from modules.logger import logger
 from modules.merkl import Merkl
+from modules.proxies import proxy_manager
 from modules.relay import Relay
 from modules.utils import random_sleep, wei
-from modules.wallet import Wallet
 
 
 class Controller:
-    def __init__(self, account: Account, action: str):
+    def __init__(
+        self,
+        account: Account,
+        action: str,
+        refuel: Future | None = None,
+        pause: Callable[[int, int], None] = random_sleep,
+        sticky_proxy: bool = False,
+    ):
         self.action = action
-        self.account = account.model_dump()
+        # One proxy for every wallet of the account, picked when the account starts
+        proxy = account.proxy if sticky_proxy else proxy_manager.acquire(account.proxy)
+        self.account = {**account.model_dump(), "proxy": proxy}
+        self.refuel = refuel
+        # Sleeps between actions, the pipeline's scheduler frees the account's slot meanwhile
+        self.pause = pause
         self.min_balance = wei(settings.REFUEL_SETTINGS["min_balance"])
         self.min_src_balance = wei(max(settings.REFUEL_SETTINGS["refuel_amount"]))
+        self.merkl_chains = ["swell", *[chain for chain in settings.MERKL_CHAINS if chain != "swell"]]
 
     def execute(self) -> None:
         handler = getattr(self, self.action)
@@ -22,48 +40,109 @@ class Controller:
 
     def check_swell(self) -> None:
         merkl = Merkl(**self.account, chain_name="swell")
-        merkl.get_claim_data()
+        merkl.get_rewards(self.merkl_chains)
 
     def claim_swell(self) -> None:
         merkl = Merkl(**self.account, chain_name="swell")
+        swell_balance, eth_balance = BalanceService("swell").get_many([(merkl.address, SWELL), (merkl.address, "")])
 
-        if merkl.get_balance(SWELL) and settings.SEND_TO_EXCHANGE:
-            merkl.transfer_token(SWELL)
-            return
+        # SWELL left on the wallet, e.g. claimed by an earlier run. Unclaimed rewards are still checked below
+        leftover = bool(swell_balance and settings.SEND_TO_EXCHANGE)
+        if leftover:
+            transferred = merkl.transfer_token(SWELL)
+            if transferred:
+                journal.record(merkl.address, TRANSFERRED, transferred if isinstance(transferred, str) else None)
+                leftover = False
+
+        # Also for accounts claimed by an earlier run, the account is only done once nothing is left to claim
+        rewards = merkl.get_rewards(self.merkl_chains, claim=True)
+        self._claim_other_chains(rewards)
 
-        claim_data = merkl.get_claim_data()
+        claim_data = merkl.get_claim_data(rewards["swell"])
         if not claim_data:
+            if not leftover:
+                journal.record(merkl.address, DONE)
+            return
+
+        if eth_balance < self.min_balance:
+            # A refuel dispatched by the planner only has to arrive, otherwise bridge now
+            if self._planned_refuel(merkl.label) or self._refuel(address=merkl.address, dest="swell"):
+                journal.record(merkl.address, REFUELED)
+            self.pause(*settings.SLEEP_BETWEEN_ACTIONS)
+
+        # The pipelined transfer only moves the claimed amount, a leftover goes with the transfer after the claim
+        if settings.SEND_TO_EXCHANGE and settings.PIPELINE_CLAIM_TRANSFER and not leftover:
+            self._finish(merkl.address, *merkl.claim_and_transfer(claim_data, SWELL))
             return
 
-        if merkl.get_balance() < self.min_balance:
-            self._refuel(dest="swell")
-            random_sleep(*settings.SLEEP_BETWEEN_ACTIONS)
+        claimed = merkl.claim(claim_data)
+        transferred = False
+
+        if claimed and settings.SEND_TO_EXCHANGE:
+            self.pause(*settings.SLEEP_BETWEEN_ACTIONS)
+            transferred = merkl.transfer_token(SWELL)
+
+        self._finish(merkl.address, claimed, transferred)
+
+    def _finish(self, address: str, claimed: str | bool, transferred: str | bool) -> None:
+        """Journal the stages reached, the account is done once nothing is left for a resumed run."""
+
+        if isinstance(claimed, str):
+            journal.record(address, CLAIMED, claimed)
+        if transferred:
+            journal.record(address, TRANSFERRED, transferred if isinstance(transferred, str) else None)
+
+        if claimed and (transferred or not settings.SEND_TO_EXCHANGE):
+            journal.record(address, DONE)
+
+    def _claim_other_chains(self, rewards: dict[str, list]) -> None:
+        """Claim rewards on chains other than Swell, one distributor tx per chain. These are not refueled."""
+
+        for chain, chain_rewards in rewards.items():
+            if chain == "swell" or not chain_rewards:
+                continue
+
+            merkl = Merkl(**self.account, chain_name=chain)
+            merkl.claim(merkl.get_claim_data(chain_rewards))
+
+    def _planned_refuel(self, label: str) -> bool:
+        """Wait for the planner's deposit to be sent, then for its fill to land."""
+
+        if self.refuel is None:
+            return False
 
-        merkl.claim(claim_data)
+        try:
+            fill = self.refuel.result()
+            if fill is None:
+                return False
 
-        if settings.SEND_TO_EXCHANGE:
-            random_sleep(*settings.SLEEP_BETWEEN_ACTIONS)
-            merkl.transfer_token(SWELL)
+            fill.result()
+            return True
+        except Exception as e:
+            logger.error(f"{label} Planned refuel failed, refueling again: {e}")
+            return False
 
-    def _get_balance_for_chain(self, chain: str) -> float:
+    def _get_balance_for_chain(self, address: str, chain: str) -> int:
         """Get ETH balance for a specific chain."""
 
-        wallet = Wallet(**self.account, chain_name=chain)
-        return wallet.get_balance()
+        (balance,) = BalanceService(chain).get_many([(address, "")])
+        return balance
 
-    def _get_rand_refuel_src(self):
+    def _get_rand_refuel_src(self, address: str):
         src_chains = settings.REFUEL_SETTINGS["chains"].copy()
         random.shuffle(src_chains)
 
-        balances = {chain: self._get_balance_for_chain(chain) for chain in src_chains}
+        with ThreadPoolExecutor(max_workers=len(src_chains)) as executor:
+            results = executor.map(lambda chain: self._get_balance_for_chain(address, chain), src_chains)
+            balances = dict(zip(src_chains, results))
 
         for chain in src_chains:
             if balances[chain] > self.min_src_balance:
                 return chain
         raise Exception("No source chain with sufficient balance")
 
-    def _refuel(self, dest: str) -> bool:
-        src = self._get_rand_refuel_src()
+    def _refuel(self, address: str, dest: str) -> bool:
+        src = self._get_rand_refuel_src(address)
         relay = Relay(**self.account, chain_name=src, dest_chain_name=dest)
 
         return relay.refuel()
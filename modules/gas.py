@@ -0,0 +1,94 @@
+import statistics
+import threading
+import time
+
+from web3.types import Wei
+
+import settings
+from data.const import network_mapping
+from models.network import Network
+from modules.pool import get_web3
+from modules.rpc_batch import RpcBatch, to_int
+
+
+class GasOracle:
+    """Fee data for one chain, shared by every wallet on it.
+
+    Fees are fetched at most once per `cache_ttl` seconds (roughly one block) no matter how many
+    accounts ask for them, so fee lookups cost a constant number of RPC calls.
+    """
+
+    def __init__(self, chain_name: str, gas_settings: dict = settings.GAS_SETTINGS):
+        self.chain: Network = network_mapping[chain_name]
+        self.w3 = get_web3(chain_name)
+        self.cache_ttl = gas_settings["cache_ttl"]
+        self.priority_fee_percentile = gas_settings["priority_fee_percentile"]
+        self.base_fee_multiplier = gas_settings["base_fee_multiplier"]
+        self.fee_history_blocks = gas_settings["fee_history_blocks"]
+
+        self._fees: dict[str, Wei] = {}
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def get_fees(self) -> dict[str, Wei]:
+        with self._lock:
+            if time.monotonic() - self._fetched_at > self.cache_ttl:
+                self._fees = self._fetch_fees()
+                self._fetched_at = time.monotonic()
+
+            return dict(self._fees)
+
+    def _fetch_fees(self) -> dict[str, Wei]:
+        if not self.chain.eip_1559:
+            (gas_price,) = RpcBatch(self.w3, self.chain.name).add("eth_gasPrice", [], to_int).execute()
+            return {"gasPrice": Wei(gas_price)}
+
+        if self.priority_fee_percentile is None:
+            base_fee, max_priority_fee = self._fetch_latest_fees()
+        else:
+            base_fee, max_priority_fee = self._fetch_fee_history()
+
+        max_fee_per_gas = int(base_fee * self.base_fee_multiplier) + max_priority_fee
+        return {"maxFeePerGas": Wei(max_fee_per_gas), "maxPriorityFeePerGas": Wei(max_priority_fee)}
+
+    def _fetch_latest_fees(self) -> tuple[int, int]:
+        base_fee, max_priority_fee = (
+            RpcBatch(self.w3, self.chain.name)
+            .add("eth_getBlockByNumber", ["latest", False], lambda block: to_int(block.get("baseFeePerGas", "0x0")))
+            .add("eth_maxPriorityFeePerGas", [], to_int, required=False)
+            .execute()
+        )
+
+        if max_priority_fee is None:
+            # eth_maxPriorityFeePerGas is not supported everywhere, web3 falls back to fee history
+            max_priority_fee = self.w3.eth.max_priority_fee
+
+        return base_fee, max_priority_fee
+
+    def _fetch_fee_history(self) -> tuple[int, int]:
+        (fee_history,) = (
+            RpcBatch(self.w3, self.chain.name)
+            .add("eth_feeHistory", [hex(self.fee_history_blocks), "latest", [self.priority_fee_percentile]])
+            .execute()
+        )
+
+        # The last base fee in the history is the one of the next block
+        base_fee = to_int(fee_history["baseFeePerGas"][-1])
+        rewards = [to_int(reward[0]) for reward in fee_history.get("reward") or [] if reward]
+
+        if not rewards:
+            return base_fee, self.w3.eth.max_priority_fee
+
+        return base_fee, int(statistics.median(rewards))
+
+
+_oracles: dict[str, GasOracle] = {}
+_oracles_lock = threading.Lock()
+
+
+def get_gas_oracle(chain_name: str) -> GasOracle:
+    with _oracles_lock:
+        if chain_name not in _oracles:
+            _oracles[chain_name] = GasOracle(chain_name)
+
+        return _oracles[chain_name]
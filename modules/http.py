@@ -1,10 +1,21 @@
+import re
+import time
+from urllib.parse import urlsplit
+
 import curl_cffi
 
+from modules.metrics import metrics
+from modules.proxies import PROXY_ERROR_STATUSES, proxy_manager
+
+# Addresses and request ids in paths would give every request its own metrics series
+HEX_RE = re.compile(r"0x[0-9a-fA-F]+")
+
 
 class HttpClient(curl_cffi.Session):
     def __init__(self, proxy: str = "", base_url: str = ""):
         super().__init__(impersonate="chrome131")
         self.base_url = base_url
+        self.proxy = proxy
 
         if proxy:
             self.proxies = {"https": proxy}
@@ -15,7 +26,22 @@ class HttpClient(curl_cffi.Session):
         else:
             url = f"{self.base_url}{endpoint}"
 
-        return self.request(method, url, *args, **kwargs)
+        parts = urlsplit(url)
+        path = HEX_RE.sub("{hex}", parts.path)
+
+        proxy_manager.begin(self.proxy)
+        start = time.perf_counter()
+        ok = False
+
+        try:
+            with metrics.timer("http_request_seconds", host=parts.netloc, path=path, method=method) as labels:
+                resp = self.request(method, url, *args, **kwargs)
+                labels["status"] = resp.status_code
+
+            ok = resp.status_code not in PROXY_ERROR_STATUSES
+            return resp
+        finally:
+            proxy_manager.end(self.proxy, time.perf_counter() - start, ok)
 
     def get(self, endpoint, *args, **kwargs):
         return self._request("GET", endpoint, *args, **kwargs)
@@ -0,0 +1,75 @@
+import json
+import os
+import threading
+import time
+
+import settings
+
+REFUELED = "refueled"
+CLAIMED = "claimed"
+TRANSFERRED = "transferred"
+DONE = "done"
+
+
+class RunJournal:
+    """Append-only JSONL record of the stage each account reached, with tx hashes.
+
+    Every record is flushed and fsynced before returning, so after a crash the journal tells
+    which accounts are finished and where the partial ones stopped.
+    """
+
+    def __init__(self, path: str = settings.RUN_JOURNAL["path"]):
+        self.path = path
+        self._stages: dict[str, dict[str, str | None]] | None = None
+        self._lock = threading.Lock()
+
+    def start(self, resume: bool = settings.RUN_JOURNAL["resume"]) -> None:
+        """Load the previous run's records when resuming, otherwise start an empty journal."""
+
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+            if not resume and os.path.exists(self.path):
+                os.remove(self.path)
+
+            self._stages = self._load()
+
+    def stages(self, address: str) -> dict[str, str | None]:
+        with self._lock:
+            return dict((self._stages or {}).get(address.lower(), {}))
+
+    def is_done(self, address: str) -> bool:
+        return DONE in self.stages(address)
+
+    def record(self, address: str, stage: str, tx_hash: str | None = None) -> None:
+        entry = {"address": address.lower(), "stage": stage, "tx_hash": tx_hash, "time": int(time.time())}
+
+        with self._lock:
+            if self._stages is None:
+                self._stages = {}
+            self._stages.setdefault(entry["address"], {})[stage] = tx_hash
+
+            with open(self.path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _load(self) -> dict[str, dict[str, str | None]]:
+        stages = {}
+
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn last line from a crash mid-write
+                        continue
+                    stages.setdefault(entry["address"], {})[entry["stage"]] = entry["tx_hash"]
+        except FileNotFoundError:
+            pass
+
+        return stages
+
+
+journal = RunJournal()
@@ -0,0 +1,131 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+
+from eth_account import Account as EthAccount
+from eth_account.signers.local import LocalAccount
+
+import settings
+from models.account import Account
+from modules.sqlite_store import SqliteStore
+
+
+@lru_cache(maxsize=settings.KEY_DERIVATION["signer_cache_size"])
+def get_signer(private_key: str) -> LocalAccount:
+    """The LocalAccount of a key, shared by every wallet built from it while the account is in flight."""
+
+    return EthAccount.from_key(private_key)
+
+
+def get_address(account: Account) -> str:
+    return account.address or get_signer(account.private_key).address
+
+
+def _derive_address(private_key: str) -> str:
+    return EthAccount.from_key(private_key).address
+
+
+class AddressIndex(SqliteStore):
+    """Key fingerprint -> address index in SQLite, so later runs skip derivation.
+
+    Lookups go to disk one batch at a time, memory doesn't grow with the number of keys.
+    Only a SHA-256 fingerprint of each key is stored, never the key itself.
+    """
+
+    SCHEMA = "CREATE TABLE IF NOT EXISTS addresses (fingerprint TEXT PRIMARY KEY, address TEXT NOT NULL)"
+
+    # Stays under SQLite's limit on bound parameters
+    CHUNK_SIZE = 500
+
+    def get_many(self, private_keys: list[str]) -> dict[str, str]:
+        """Addresses of the keys found in the index, by key."""
+
+        by_fingerprint = {self._fingerprint(key): key for key in private_keys}
+        found = {}
+
+        with self._connect() as conn:
+            fingerprints = iter(by_fingerprint)
+            while chunk := list(islice(fingerprints, self.CHUNK_SIZE)):
+                rows = conn.execute(
+                    f"SELECT fingerprint, address FROM addresses WHERE fingerprint IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                found.update((by_fingerprint[fingerprint], address) for fingerprint, address in rows)
+
+        return found
+
+    def update(self, addresses: dict[str, str]) -> None:
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO addresses (fingerprint, address) VALUES (?, ?)",
+                ((self._fingerprint(key), address) for key, address in addresses.items()),
+            )
+
+    def _fingerprint(self, private_key: str) -> str:
+        return hashlib.sha256(private_key.lower().removeprefix("0x").encode()).hexdigest()
+
+
+address_index = AddressIndex(settings.KEY_DERIVATION["index_path"]) if settings.KEY_DERIVATION["index_path"] else None
+
+_process_pool: ProcessPoolExecutor | None = None
+_process_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """One derivation pool for the whole run, started with the first batch that needs it.
+
+    Workers are spawned rather than forked, by then the pipeline's threads are running and a
+    forked child could inherit a lock one of them held.
+    """
+
+    global _process_pool
+
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count(), mp_context=multiprocessing.get_context("spawn")
+            )
+
+        return _process_pool
+
+
+def derive_addresses(
+    accounts: list[Account],
+    index: AddressIndex | None = address_index,
+    process_pool_min: int = settings.KEY_DERIVATION["process_pool_min"],
+) -> None:
+    """Fill in `address` of every account, from the on-disk index where possible.
+
+    Missing addresses are derived in a process pool once there are at least `process_pool_min`
+    of them and more than one CPU, otherwise in this process.
+    """
+
+    pending = [account for account in accounts if account.address is None]
+
+    if pending and index:
+        known = index.get_many([account.private_key for account in pending])
+        for account in pending:
+            account.address = known.get(account.private_key)
+
+    missing = [account for account in pending if account.address is None]
+    if not missing:
+        return
+
+    keys = [account.private_key for account in missing]
+    workers = os.cpu_count() or 1
+
+    if len(keys) >= process_pool_min and workers > 1:
+        chunksize = max(1, len(keys) // (workers * 4))
+        addresses = list(get_process_pool().map(_derive_address, keys, chunksize=chunksize))
+    else:
+        addresses = [_derive_address(key) for key in keys]
+
+    for account, address in zip(missing, addresses):
+        account.address = address
+
+    if index:
+        index.update(dict(zip(keys, addresses)))
@@ -15,5 +15,6 @@ logger.add(
 logger.add(
     sink=LOG_OUTPUT,
     rotation=LOG_ROTATION,
+    delay=True,
     format="<white>{time:HH:mm:ss}</white> | <level>{message}</level>",
 )
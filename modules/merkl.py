@@ -1,61 +1,182 @@
-from data.const import MERKL_DISTRIBUTER
+from concurrent.futures import ThreadPoolExecutor
+
+import settings
+from data.const import MERKL_DISTRIBUTER, MERKL_DISTRIBUTER_ABI, network_mapping
 from models.responses.claim_response import ClaimResponse
-from models.responses.rewards_response import RewardsResponse
-from modules.http import HttpClient
+from models.responses.rewards_response import RewardsResponse, SlimReward, SlimRewardsResponse
+from modules.cache import gas_profiles
 from modules.logger import logger
+from modules.pool import get_http_client
+from modules.rewards_store import rewards_store
 from modules.wallet import Wallet
 
 
 class Merkl(Wallet):
-    def __init__(self, id: str, private_key: str, chain_name: str, proxy: str = "", recipient: str | None = None):
-        super().__init__(id, private_key, chain_name, proxy, recipient)
-        self.http = HttpClient(self.proxy)
+    def __init__(
+        self,
+        id: str,
+        private_key: str,
+        chain_name: str,
+        proxy: str = "",
+        recipient: str | None = None,
+        address: str | None = None,
+    ):
+        super().__init__(id, private_key, chain_name, proxy, recipient, address)
+        self.http = get_http_client(self.proxy)
         self.label += "Merkl |"
 
-    def get_proofs(self, id: int = 1923) -> RewardsResponse | None:
-        url = f"https://api.merkl.xyz/v4/users/{self.address}/rewards?chainId={id}"
+    def get_proofs(self, id: int | None = None, claim: bool = False) -> SlimRewardsResponse | None:
+        """Rewards and proofs of the chain, from the rewards store while fresh enough.
+
+        The proofs end up in claim calldata, so with `claim` only responses younger than `claim_ttl` are reused.
+        """
+
+        chain_id = id or self.chain.id
+        model = RewardsResponse if settings.STRICT_RESPONSE_MODELS else SlimRewardsResponse
+        ttl = settings.MERKL_CACHE["claim_ttl" if claim else "ttl"]
+        payload = None
+
+        if not settings.MERKL_CACHE["force_refresh"] and ttl != 0:
+            payload = rewards_store.get(self.address, chain_id, ttl)
 
-        resp = self.http.get(url)
-        data = RewardsResponse(resp.json())
+        if payload is not None:
+            data = model.model_validate_json(payload)
+        else:
+            url = f"{settings.MERKL_API_URL}/v4/users/{self.address}/rewards?chainId={chain_id}"
+            payload = self.http.get(url).content
+
+            # Only a payload that validates as a rewards list is stored
+            data = model.model_validate_json(payload)
+            rewards_store.put(self.address, chain_id, payload)
 
         if not data.root:
-            logger.warning(f"{self.label} No Swell rewards found for this address")
+            chain_name = next((chain.name for chain in network_mapping.values() if chain.id == chain_id), chain_id)
+            logger.warning(f"{self.label} No {str(chain_name).title()} rewards found for this address")
 
         return data
 
-    def get_claim_data(self) -> ClaimResponse | None:
-        url = f"https://app.merkl.xyz/transaction/claim"
+    def get_unclaimed(self, id: int | None = None, claim: bool = False) -> list[SlimReward]:
+        """Every reward of every campaign on the chain that still has something to claim."""
 
-        rewards_data = self.get_proofs()
+        rewards_data = self.get_proofs(id, claim)
+        unclaimed = []
 
-        if not rewards_data.root:
-            return
+        for item in rewards_data.root:
+            for reward in item.rewards:
+                decimals = reward.token.decimals
+
+                if int(reward.amount) > int(reward.claimed):
+                    claimable = int(reward.amount) - int(reward.claimed)
+                    logger.debug(f"{self.label} Eligible for {claimable / 10**decimals} {reward.token.symbol}")
+                    unclaimed.append(reward)
+                elif reward.claimed != "0":
+                    logger.warning(
+                        f"{self.label} Already claimed {int(reward.claimed) / 10**decimals} {reward.token.symbol}"
+                    )
+
+        return unclaimed
 
-        proofs = rewards_data.root[0].rewards[0].proofs
-        distributor = self.w3.to_checksum_address(rewards_data.root[0].rewards[0].token.address)
-        amount = rewards_data.root[0].rewards[0].amount
-        claimed_amount = rewards_data.root[0].rewards[0].claimed
-        decimals = rewards_data.root[0].rewards[0].token.decimals
+    def get_rewards(self, chain_names: list[str], claim: bool = False) -> dict[str, list[SlimReward]]:
+        """Scan several chains concurrently for unclaimed rewards."""
 
-        if claimed_amount != "0":
-            logger.warning(f"{self.label} Already claimed {int(claimed_amount) / 10**decimals} Swell")
+        with ThreadPoolExecutor(max_workers=len(chain_names)) as executor:
+            results = executor.map(lambda chain: self.get_unclaimed(network_mapping[chain].id, claim), chain_names)
+            return dict(zip(chain_names, results))
+
+    def has_unclaimed_rewards(self) -> bool:
+        return bool(self.get_unclaimed())
+
+    def get_claim_data(self, rewards: list[SlimReward] | None = None) -> ClaimResponse | None:
+        """Pack all unclaimed rewards of this chain into a single distributor claim."""
+
+        if rewards is None:
+            rewards = self.get_unclaimed(claim=True)
+
+        if not rewards:
             return
 
-        logger.debug(f"{self.label} Eligible for {int(amount) / 10**decimals} Swell")
+        tokens = [self.w3.to_checksum_address(reward.token.address) for reward in rewards]
+        args = [
+            [self.address] * len(rewards),
+            tokens,
+            [int(reward.amount) for reward in rewards],
+            [reward.proofs for reward in rewards],
+        ]
 
+        contract = self.get_contract(MERKL_DISTRIBUTER, MERKL_DISTRIBUTER_ABI)
+        claim_data = ClaimResponse(
+            to=MERKL_DISTRIBUTER,
+            data=contract.encode_abi("claim", args),
+            amounts={token: int(reward.amount) - int(reward.claimed) for token, reward in zip(tokens, rewards)},
+        )
+
+        if settings.VERIFY_MERKL_CALLDATA:
+            self._verify_claim_data(claim_data, args)
+
+        return claim_data
+
+    def _verify_claim_data(self, claim_data: ClaimResponse, args: list) -> None:
         payload = {
             "userAddress": self.address,
-            "distributor": distributor,
-            "args": [[self.address], [distributor], [amount], [proofs]],
+            "distributor": args[1][0],
+            "args": [args[0], args[1], [str(amount) for amount in args[2]], args[3]],
             "sponsor": False,
         }
 
-        resp = self.http.post(url, json=payload)
-        return ClaimResponse(**resp.json())
+        resp = self.http.post(f"{settings.MERKL_APP_URL}/transaction/claim", json=payload)
+        remote = ClaimResponse.model_validate_json(resp.content)
+
+        if (remote.data or "").lower() != claim_data.data.lower():
+            logger.warning(f"{self.label} Local claim calldata differs from the Merkl app")
 
-    def claim(self, claim_data: ClaimResponse | None = None):
+    def claim(self, claim_data: ClaimResponse | None = None) -> str | bool:
         if claim_data is None:
-            return
+            return False
+
+        tx_params = self.get_tx_params(to=MERKL_DISTRIBUTER, data=claim_data.data, get_gas=True, use_gas_profile=False)
+        tx_status = self.send_tx(tx_params, tx_label=f"{self.label} Claim rewards")
+        rewards_store.invalidate(self.address, self.chain.id)
+
+        return tx_status
+
+    def claim_and_transfer(self, claim_data: ClaimResponse, token_address: str) -> tuple[str | bool, str | bool]:
+        """Broadcast the claim and the transfer of the claimed amount back-to-back, then confirm both.
+
+        Returns the confirmed claim and transfer tx hashes, False for a tx that didn't go through.
+
+        The transfer can't be estimated before the claim lands, so it uses the gas profile of its
+        shape, or a fixed gas limit until there is one, and the claim's fee parameters.
+        """
+
+        amount = claim_data.amounts.get(self.w3.to_checksum_address(token_address))
+
+        if not self.recipient or not amount:
+            return self.claim(claim_data), False
+
+        token = self.get_token_info(token_address)
+        # The estimate catches a claim that would revert, e.g. on proofs of an outdated root
+        claim_tx = self.get_tx_params(to=MERKL_DISTRIBUTER, data=claim_data.data, get_gas=True, use_gas_profile=False)
+        transfer_tx = self.get_transfer_tx(token_address, amount)
+
+        transfer_gas = gas_profiles.limit(gas_profiles.key(self.chain.id, transfer_tx))
+        transfer_tx["gas"] = transfer_gas or settings.PIPELINED_TRANSFER_GAS
+        for fee in ("maxFeePerGas", "maxPriorityFeePerGas", "gasPrice"):
+            if fee in claim_tx:
+                transfer_tx[fee] = claim_tx[fee]
+
+        claim_label = f"{self.label} Claim rewards"
+        transfer_label = self.transfer_label(token, amount)
+
+        claim_hash = self.broadcast_tx(claim_tx, claim_label)
+        if not claim_hash:
+            return False, False
+
+        # The stored rewards show nothing claimed yet, they must not be reused after this point
+        rewards_store.invalidate(self.address, self.chain.id)
+
+        transfer_hash = self.broadcast_tx(transfer_tx, transfer_label)
+
+        claimed = self.confirm_tx(claim_hash, claim_label)
+        transferred = self.confirm_tx(transfer_hash, transfer_label) if transfer_hash else False
 
-        tx_params = self.get_tx_params(to=MERKL_DISTRIBUTER, data=claim_data.data, get_gas=True)
-        self.send_tx(tx_params, tx_label=f"{self.label} Claim rewards")
+        return claimed, transferred
@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Iterator
+
+import settings
+from modules.logger import logger
+
+# Upper bounds in seconds, shared by every histogram
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.buckets[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile, the max for the overflow bucket."""
+
+        rank = q * self.count
+        seen = 0
+
+        for bound, count in zip(BUCKETS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+
+        return self.max
+
+
+class Metrics:
+    """Process-wide counters and latency histograms, keyed by name and labels."""
+
+    def __init__(self):
+        self._counters: dict[tuple[str, Labels], float] = {}
+        self._histograms: dict[tuple[str, Labels], Histogram] = {}
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, self._labels(labels))
+
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, self._labels(labels))
+
+        with self._lock:
+            if key not in self._histograms:
+                self._histograms[key] = Histogram()
+            self._histograms[key].observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[dict]:
+        """Observe the duration of the block. Labels added to the yielded dict are recorded too."""
+
+        start = time.perf_counter()
+        try:
+            yield labels
+        except Exception:
+            labels.setdefault("result", "exception")
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def total(self, name: str) -> tuple[int, float]:
+        """Observation count and summed value of a histogram across all labels."""
+
+        with self._lock:
+            histograms = [histogram for (key, _), histogram in self._histograms.items() if key == name]
+            return sum(h.count for h in histograms), sum(h.sum for h in histograms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "uptime": time.monotonic() - self.started,
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self._counters.items())
+                ],
+                "histograms": [
+                    {
+                        "name": name,
+                        "labels": dict(labels),
+                        "count": histogram.count,
+                        "sum": histogram.sum,
+                        "p50": histogram.quantile(0.5),
+                        "p99": histogram.quantile(0.99),
+                        "max": histogram.max,
+                    }
+                    for (name, labels), histogram in sorted(self._histograms.items())
+                ],
+            }
+
+    def to_prometheus(self) -> str:
+        lines = []
+
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                lines.append(f"{name}{self._format_labels(labels)} {value}")
+
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                cumulative = 0
+                for bound, count in zip((*BUCKETS, "+Inf"), histogram.buckets):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{self._format_labels((*labels, ('le', str(bound))))} {cumulative}")
+                lines.append(f"{name}_sum{self._format_labels(labels)} {histogram.sum}")
+                lines.append(f"{name}_count{self._format_labels(labels)} {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, export_format: str | None = None, path: str | None = None) -> None:
+        export_format = export_format or settings.METRICS["export"]
+        path = path or settings.METRICS["path"]
+
+        if not export_format:
+            return
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        with open(path, "w") as f:
+            if export_format == "prometheus":
+                f.write(self.to_prometheus())
+            else:
+                json.dump(self.snapshot(), f, indent=2)
+
+        logger.info(f"Metrics written to {path}")
+
+    def summary_line(self) -> str:
+        """Where the time went: RPC, HTTP APIs, tx confirmations, bridge fills and deliberate sleeps.
+
+        These overlap across accounts, so each figure is the time summed over all calls and can
+        exceed the wall time printed in front of them.
+        """
+
+        parts = []
+        for label, name in (
+            ("RPC", "rpc_request_seconds"),
+            ("HTTP", "http_request_seconds"),
+            ("Tx confirm", "tx_confirm_seconds"),
+            ("Bridge", "relay_fill_seconds"),
+            ("Sleep", "sleep_seconds"),
+        ):
+            count, total = self.total(name)
+            if count:
+                parts.append(f"{label} {count}x {total:.0f}s")
+
+        wall = f"Wall {time.monotonic() - self.started:.0f}s"
+        return f"{wall} | Cumulative: {', '.join(parts)}" if parts else f"{wall} | No activity yet"
+
+    @contextmanager
+    def live(self, interval: float | None = None) -> Iterator[None]:
+        """Log the summary line every `interval` seconds while the block runs."""
+
+        interval = interval if interval is not None else settings.METRICS["live_interval"]
+        if not interval:
+            yield
+            return
+
+        stop = threading.Event()
+
+        def report() -> None:
+            while not stop.wait(interval):
+                logger.info(f"Stats | {self.summary_line()}")
+
+        thread = threading.Thread(target=report, daemon=True)
+        thread.start()
+
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def _labels(self, labels: dict) -> Labels:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def _format_labels(self, labels: Labels) -> str:
+        if not labels:
+            return ""
+
+        return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+metrics = Metrics()
@@ -0,0 +1,39 @@
+import threading
+
+
+class NonceManager:
+    """Assigns nonces locally per (chain_id, address).
+
+    The first nonce for a key is seeded from the chain, after that nonces are handed out from memory
+    so dependent txs can be signed and broadcast back-to-back. Call `resync` whenever a tx is dropped
+    or fails so the next nonce is read from the chain again.
+    """
+
+    def __init__(self):
+        self._nonces: dict[tuple[int, str], int] = {}
+        self._lock = threading.Lock()
+
+    def is_known(self, chain_id: int, address: str) -> bool:
+        with self._lock:
+            return (chain_id, address) in self._nonces
+
+    def take(self, chain_id: int, address: str, chain_nonce: int | None = None) -> int:
+        """Reserve the next nonce, `chain_nonce` is the pending tx count if it was just read from the chain."""
+
+        key = (chain_id, address)
+
+        with self._lock:
+            if key not in self._nonces and chain_nonce is None:
+                raise ValueError(f"No nonce known for {address} on chain {chain_id}")
+
+            nonce = max(self._nonces.get(key, 0), chain_nonce or 0)
+            self._nonces[key] = nonce + 1
+
+            return nonce
+
+    def resync(self, chain_id: int, address: str) -> None:
+        with self._lock:
+            self._nonces.pop((chain_id, address), None)
+
+
+nonce_manager = NonceManager()
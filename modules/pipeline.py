@@ -0,0 +1,156 @@
+import asyncio
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
+from typing import AsyncIterator, Iterable, Iterator
+
+import settings
+from models.account import Account
+from modules.controller import Controller
+from modules.journal import journal
+from modules.keys import get_address
+from modules.logger import logger
+from modules.planner import RefuelPlanner
+from modules.rpc_batch import RpcBatch
+from modules.scheduler import Scheduler
+
+
+class Pipeline:
+    """Runs Controller flows for many accounts concurrently.
+
+    Each account is still processed by a single Controller call, so the per-account
+    ordering (refuel -> claim -> transfer) is unchanged. Concurrency only applies across accounts.
+
+    Accounts start SLEEP_BETWEEN_WALLETS apart, counted from the previous account's actual start
+    when the scheduler grants its slot. Waiting for a start time, or out a SLEEP_BETWEEN_ACTIONS
+    pause, does not take one of the `concurrency` slots, so a run lasts about the sum of the
+    wallet spacing plus the work instead of the sum of all sleeps.
+    Up to `max_in_flight` accounts are started or paused at a time, and accounts are read in
+    windows of `window`, refuel-planned one window ahead with plan_ahead. With `resume`, claim_swell
+    skips the accounts the journal of the previous run marks as done.
+    """
+
+    def __init__(
+        self,
+        accounts: Iterable[Account],
+        action: str,
+        concurrency: int = settings.CONCURRENCY,
+        one_slot_per_proxy: bool = settings.ONE_SLOT_PER_PROXY,
+        max_in_flight: int = settings.MAX_ACCOUNTS_IN_FLIGHT,
+        window: int = settings.DISPATCH_WINDOW,
+        resume: bool = settings.RUN_JOURNAL["resume"],
+    ):
+        self.accounts = accounts
+        self.action = action
+        self.concurrency = max(1, concurrency)
+        self.one_slot_per_proxy = one_slot_per_proxy
+        self.max_in_flight = max(self.concurrency, max_in_flight)
+        self.window = max(1, window)
+        self.resume = resume
+        self.scheduler = Scheduler(self.concurrency, spacing=settings.SLEEP_BETWEEN_WALLETS)
+
+        self.proxy_locks: dict[str, asyncio.Lock] = {}
+        self.refuels: dict[str, Future] = {}
+        self.processed = 0
+        self.failed = 0
+        self.skipped = 0
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.max_in_flight))
+
+        start = time.perf_counter()
+
+        if self.action == "claim_swell":
+            journal.start(self.resume)
+            self.accounts = (account for account in self.accounts if not self._is_done(account))
+
+        planner = None
+        if self.action == "claim_swell" and settings.REFUEL_SETTINGS["plan_ahead"]:
+            planner = RefuelPlanner()
+
+        with planner or nullcontext():
+            await self._dispatch(self._windows(iter(self.accounts), planner))
+        elapsed = time.perf_counter() - start
+
+        rate = self.processed / (elapsed / 60) if elapsed else 0
+        if self.skipped:
+            logger.info(f"Skipped {self.skipped} accounts finished in a previous run")
+        logger.info(
+            f"Processed {self.processed} accounts ({self.failed} failed) in {elapsed:.0f}s | {rate:.2f} accounts/min"
+        )
+        RpcBatch.log_stats()
+
+    async def _windows(self, accounts: Iterator[Account], planner: RefuelPlanner | None) -> AsyncIterator[Account]:
+        """Accounts one window at a time, the next window is read and planned while this one is dispatched.
+
+        Reading the keys, deriving addresses and planning refuels run off the event loop, and
+        only two windows are held at once.
+        """
+
+        next_window = asyncio.create_task(self._next_window(accounts, planner))
+
+        while window := await next_window:
+            next_window = asyncio.create_task(self._next_window(accounts, planner))
+            for account in window:
+                yield account
+
+    async def _next_window(self, accounts: Iterator[Account], planner: RefuelPlanner | None) -> list[Account]:
+        window = await asyncio.to_thread(lambda: list(islice(accounts, self.window)))
+
+        if window and planner:
+            try:
+                self.refuels.update(await asyncio.to_thread(planner.plan, window))
+            except Exception as e:
+                logger.error(f"Refuel planning failed, accounts will refuel on their own: {e}")
+
+        return window
+
+    async def _dispatch(self, accounts: AsyncIterator[Account]) -> None:
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        tasks = set()
+
+        async for account in accounts:
+            await in_flight.acquire()
+
+            # Due right away, the scheduler spaces it from the previous account when a slot is granted
+            task = asyncio.create_task(self._process(account, time.monotonic()))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            task.add_done_callback(lambda _: in_flight.release())
+
+        await asyncio.gather(*tasks)
+
+    async def _process(self, account: Account, start_at: float) -> None:
+        try:
+            refuel = self.refuels.pop(account.id, None)
+            async with self._proxy_slot(account):
+                await asyncio.to_thread(self._execute, account, refuel, start_at)
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"{account.id} An error occurred: {e}")
+        finally:
+            self.processed += 1
+
+    def _execute(self, account: Account, refuel: Future | None, start_at: float) -> None:
+        with self.scheduler.slot(start_at):
+            # Built once the account starts, so its proxy is picked on the latest scores.
+            # One slot per proxy needs the account to stay on the proxy it was given
+            controller = Controller(
+                account, self.action, refuel=refuel, pause=self.scheduler.pause, sticky_proxy=self.one_slot_per_proxy
+            )
+            controller.execute()
+
+    def _is_done(self, account: Account) -> bool:
+        if journal.is_done(get_address(account)):
+            self.skipped += 1
+            return True
+
+        return False
+
+    def _proxy_slot(self, account: Account) -> asyncio.Lock | nullcontext:
+        if not self.one_slot_per_proxy or not account.proxy:
+            return nullcontext()
+
+        return self.proxy_locks.setdefault(account.proxy, asyncio.Lock())
@@ -0,0 +1,93 @@
+import random
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import settings
+from models.account import Account
+from modules.balances import BalanceService
+from modules.keys import get_address
+from modules.logger import logger
+from modules.merkl import Merkl
+from modules.proxies import proxy_manager
+from modules.relay import Relay
+from modules.utils import wei
+
+
+class RefuelPlanner:
+    """Finds the accounts of a window that will need gas on the destination chain and dispatches their refuels up front.
+
+    Balances are read in bulk (one Multicall3 pass per chain), so bridge fills overlap across
+    accounts instead of adding up one account after another. Each planned account gets a future of
+    its deposit, which resolves to the fill future of the status tracker once the deposit tx is sent,
+    so a deposit thread is only held for the quote and the broadcast. Use it as a context manager,
+    the deposit threads are released on exit once the deposits still being sent are out.
+    """
+
+    def __init__(self, dest: str = "swell"):
+        self.dest = dest
+        self.min_balance = wei(settings.REFUEL_SETTINGS["min_balance"])
+        self.min_src_balance = wei(max(settings.REFUEL_SETTINGS["refuel_amount"]))
+        self.executor = ThreadPoolExecutor(max_workers=settings.REFUEL_SETTINGS["parallel_deposits"])
+
+    def __enter__(self) -> "RefuelPlanner":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.executor.shutdown(wait=True)
+
+    def plan(self, accounts: list[Account]) -> dict[str, Future]:
+        addresses = [get_address(account) for account in accounts]
+
+        eth_balances = BalanceService(self.dest).get_many([(address, "") for address in addresses])
+
+        candidates = [i for i, eth_balance in enumerate(eth_balances) if eth_balance < self.min_balance]
+        # Each candidate checks its rewards and deposits through one proxy
+        sessions = {
+            i: accounts[i].model_copy(update={"proxy": proxy_manager.acquire(accounts[i].proxy)}) for i in candidates
+        }
+        eligible = list(self.executor.map(self._is_eligible, [sessions[i] for i in candidates]))
+        candidates = [i for i, has_rewards in zip(candidates, eligible) if has_rewards]
+
+        if not candidates:
+            return {}
+
+        src_balances = {
+            chain: BalanceService(chain).get_many([(addresses[i], "") for i in candidates])
+            for chain in settings.REFUEL_SETTINGS["chains"]
+        }
+
+        refuels = {}
+        for n, i in enumerate(candidates):
+            src = self._pick_source({chain: balances[n] for chain, balances in src_balances.items()})
+
+            if src is None:
+                logger.warning(f"{accounts[i].id} {addresses[i]} | No source chain with sufficient balance")
+                continue
+
+            refuels[accounts[i].id] = self.executor.submit(self._deposit, sessions[i], src)
+
+        logger.info(f"Dispatched {len(refuels)} refuels to {self.dest.title()}")
+        return refuels
+
+    def _is_eligible(self, account: Account) -> bool:
+        try:
+            merkl = Merkl(**account.model_dump(), chain_name=self.dest)
+            return merkl.has_unclaimed_rewards()
+        except Exception as e:
+            logger.error(f"{account.id} Couldn't check rewards: {e}")
+            return False
+
+    def _pick_source(self, balances: dict[str, int]) -> str | None:
+        src_chains = list(balances)
+        random.shuffle(src_chains)
+
+        for chain in src_chains:
+            if balances[chain] > self.min_src_balance:
+                return chain
+
+        return None
+
+    def _deposit(self, account: Account, src: str) -> Future | None:
+        relay = Relay(**account.model_dump(), chain_name=src, dest_chain_name=self.dest)
+        deposit = relay.deposit()
+
+        return deposit[1] if deposit else None
@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from web3 import Web3
+from web3.middleware import ExtraDataToPOAMiddleware
+
+import settings
+from modules.http import HttpClient
+from modules.provider import MultiEndpointProvider
+
+
+class ResourcePool:
+    """Process-wide LRU of reusable objects (Web3 stacks, HTTP sessions).
+
+    Entries idle for longer than `idle_timeout` seconds are dropped, and the least recently
+    used entry is dropped once `max_size` is exceeded. Dropped objects are not closed here,
+    accounts still holding one keep using it until they are done with it.
+    """
+
+    def __init__(self, max_size: int = settings.POOL_MAX_SIZE, idle_timeout: int = settings.POOL_IDLE_TIMEOUT):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._entries: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        with self._lock:
+            now = time.monotonic()
+            self._evict_idle(now)
+
+            if key in self._entries:
+                obj, _ = self._entries.pop(key)
+            else:
+                obj = factory()
+
+            self._entries[key] = (obj, now)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+            return obj
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _evict_idle(self, now: float) -> None:
+        # Entries are kept in least-recently-used order, so only the head can be stale
+        while self._entries:
+            key, (_, last_used) = next(iter(self._entries.items()))
+            if now - last_used <= self.idle_timeout:
+                break
+            del self._entries[key]
+
+
+web3_pool = ResourcePool()
+http_pool = ResourcePool()
+
+
+def _build_web3(chain_name: str, proxy: str) -> Web3:
+    request_kwargs = {"proxies": {"http": proxy, "https": proxy}} if proxy else None
+
+    urls = settings.RPC_LIST[chain_name]
+    urls = [urls] if isinstance(urls, str) else urls
+
+    web3 = Web3(MultiEndpointProvider(chain_name, urls, request_kwargs=request_kwargs))
+    web3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
+
+    return web3
+
+
+def get_web3(chain_name: str, proxy: str = "") -> Web3:
+    return web3_pool.get((chain_name, proxy), lambda: _build_web3(chain_name, proxy))
+
+
+def get_http_client(proxy: str = "", base_url: str = "") -> HttpClient:
+    return http_pool.get((base_url, proxy), lambda: HttpClient(proxy, base_url))
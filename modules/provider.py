@@ -0,0 +1,341 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Any, Callable
+from urllib.parse import urlsplit
+
+from web3 import HTTPProvider, Web3
+from web3.types import RPCEndpoint, RPCResponse
+
+import settings
+from modules.logger import logger
+from modules.metrics import metrics
+
+# Calls that must see the same mempool as the txs they relate to
+CONSISTENT_METHODS = (
+    "eth_sendRawTransaction",
+    "eth_sendTransaction",
+    "eth_getTransactionCount",
+    "eth_getTransactionByHash",
+)
+
+# RPC errors that come from the endpoint rather than the call itself
+ENDPOINT_ERROR_CODES = (-32005, -32016, -32097, 429)
+ENDPOINT_ERROR_MESSAGES = ("rate limit", "too many requests", "limit exceeded", "header not found", "missing trie node")
+
+# Answers to a raw tx the endpoint already has, the tx made it there
+ALREADY_KNOWN_MESSAGES = ("already known", "known transaction", "already imported")
+
+_hedge_executor: ThreadPoolExecutor | None = None
+_hedge_lock = threading.Lock()
+
+
+def get_hedge_executor() -> ThreadPoolExecutor:
+    global _hedge_executor
+
+    with _hedge_lock:
+        if _hedge_executor is None:
+            _hedge_executor = ThreadPoolExecutor(max_workers=settings.RPC_SETTINGS["hedge_workers"])
+
+        return _hedge_executor
+
+
+class HedgeTimer:
+    """Runs callbacks at their deadline on one shared thread, the hedge pool only gets the hedges that fire."""
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, Callable[[], None]]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> None:
+        with self._cond:
+            heapq.heappush(self._heap, (time.monotonic() + delay, next(self._seq), callback))
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    self._cond.wait(timeout=self._heap[0][0] - time.monotonic() if self._heap else None)
+                _, _, callback = heapq.heappop(self._heap)
+
+            callback()
+
+
+hedge_timer = HedgeTimer()
+
+
+class EndpointError(Exception):
+    """The endpoint answered with a rate limit or another error of its own, the call can go elsewhere."""
+
+
+class RpcEndpoint:
+    def __init__(self, url: str, provider: HTTPProvider, rpc_settings: dict):
+        self.url = url
+        self.host = urlsplit(url).netloc
+        self.provider = provider
+        self.alpha = rpc_settings["ewma_alpha"]
+        self.min_cooldown = rpc_settings["cooldown"]
+        self.max_cooldown = rpc_settings["max_cooldown"]
+
+        self.latency: float | None = None
+        self.latencies: deque[float] = deque(maxlen=200)
+        self.cooldown = self.min_cooldown
+        self.cooldown_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def healthy(self) -> bool:
+        return self.cooldown_until <= time.monotonic()
+
+    def score(self) -> float:
+        # Untested endpoints score 0 so each one gets measured
+        return self.latency or 0.0
+
+    def p95(self) -> float | None:
+        with self._lock:
+            if len(self.latencies) < 20:
+                return None
+            return sorted(self.latencies)[int(len(self.latencies) * 0.95)]
+
+    def succeeded(self, latency: float) -> None:
+        with self._lock:
+            self.latencies.append(latency)
+            self.latency = latency if self.latency is None else self.latency + self.alpha * (latency - self.latency)
+            if self.healthy:
+                self.cooldown = self.min_cooldown
+
+    def failed(self, chain_name: str, error: Exception) -> None:
+        with self._lock:
+            if not self.healthy:
+                return
+
+            self.cooldown_until = time.monotonic() + self.cooldown
+            logger.debug(f"{chain_name.title()} RPC | {self.host} benched for {self.cooldown:.0f}s: {error}")
+            self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+
+
+class MultiEndpointProvider(HTTPProvider):
+    """HTTP provider over several RPC endpoints of one chain.
+
+    Reads go to the endpoint with the lowest latency EWMA and fail over to the next one on
+    transport errors, HTTP errors and rate limits, the failing endpoint is benched with a backoff.
+    With `hedge_reads`, a read still unanswered after the endpoint's p95 latency is also sent to
+    the second best endpoint, and whichever answers first is used. Txs, nonces and mempool lookups stick to
+    one write endpoint, which only changes when it fails. With `broadcast_to_all`, raw txs are sent
+    to every endpoint at once and the first one to accept becomes the write endpoint.
+
+    Every attempt is recorded in the rpc metrics by chain, method and endpoint.
+    """
+
+    def __init__(self, chain_name: str, urls: list[str], rpc_settings: dict = settings.RPC_SETTINGS, **kwargs):
+        super().__init__(urls[0], **kwargs)
+        self.chain_name = chain_name
+        self.hedge_reads = rpc_settings["hedge_reads"]
+        self.hedge_delay = rpc_settings["hedge_delay"]
+        self.broadcast_to_all = rpc_settings["broadcast_to_all"]
+
+        # A single endpoint keeps web3's own retries, there is nothing to fail over to
+        retry = {} if len(urls) == 1 else {"exception_retry_configuration": None}
+        self.endpoints = [RpcEndpoint(url, HTTPProvider(url, **kwargs, **retry), rpc_settings) for url in urls]
+        self._write_endpoint = self.endpoints[0]
+        self._write_lock = threading.Lock()
+
+    def make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
+        metrics.inc("rpc_calls_total", chain=self.chain_name, method=method)
+
+        if method == "eth_sendRawTransaction" and self.broadcast_to_all and len(self.endpoints) > 1:
+            return self._broadcast(params)
+
+        return self._route(method, [method], lambda provider: provider.make_request(method, params))
+
+    def make_batch_request(self, batch_requests: list[tuple[RPCEndpoint, Any]]) -> list[RPCResponse] | RPCResponse:
+        methods = [method for method, _ in batch_requests]
+        for method in methods:
+            metrics.inc("rpc_calls_total", chain=self.chain_name, method=method)
+
+        return self._route("batch", methods, lambda provider: provider.make_batch_request(batch_requests))
+
+    def _route(self, label: str, methods: list[str], send: Callable[[HTTPProvider], Any]) -> Any:
+        consistent = any(method in CONSISTENT_METHODS for method in methods)
+        candidates = self._candidates(consistent)
+        error: Exception | None = None
+
+        if not consistent and self.hedge_reads and len(candidates) > 1:
+            tried: list[RpcEndpoint] = []
+            try:
+                return self._hedged(label, send, candidates[0], candidates[1], tried)
+            except Exception as e:
+                error = e
+                candidates = [endpoint for endpoint in candidates if endpoint not in tried]
+
+        for endpoint in candidates:
+            try:
+                response = self._attempt(label, send, endpoint)
+            except Exception as e:
+                error = e
+                continue
+
+            if consistent:
+                with self._write_lock:
+                    self._write_endpoint = endpoint
+            return response
+
+        raise error
+
+    def _candidates(self, consistent: bool) -> list[RpcEndpoint]:
+        endpoints = sorted(self.endpoints, key=RpcEndpoint.score)
+
+        if consistent:
+            with self._write_lock:
+                write_endpoint = self._write_endpoint
+            endpoints.remove(write_endpoint)
+            endpoints.insert(0, write_endpoint)
+
+        # Benched endpoints stay at the end as a last resort
+        return [endpoint for endpoint in endpoints if endpoint.healthy] + [
+            endpoint for endpoint in endpoints if not endpoint.healthy
+        ]
+
+    def _hedged(
+        self, label: str, send: Callable, primary: RpcEndpoint, secondary: RpcEndpoint, tried: list[RpcEndpoint]
+    ) -> Any:
+        """Send to `primary`, and to `secondary` as well if the primary is slow, and return the first answer.
+
+        Both attempts run on the hedge pool. The hedge fires once the primary has run for its p95
+        latency, counted from when the primary actually starts, so time queued in the pool doesn't
+        count. The first success is returned while the other attempt finishes in the background,
+        the last error is raised once every attempt sent has failed. The endpoints used are added to `tried`.
+        """
+
+        lock = threading.Lock()
+        done = threading.Event()
+        state = {"pending": 1, "finished": False, "response": None, "error": None}
+
+        def attempt(endpoint: RpcEndpoint) -> None:
+            try:
+                response, error = self._attempt(label, send, endpoint), None
+            except Exception as e:
+                response, error = None, e
+
+            with lock:
+                state["pending"] -= 1
+                if state["finished"]:
+                    return
+
+                if error is None:
+                    state["response"] = response
+                else:
+                    state["error"] = error
+                    if state["pending"]:
+                        return
+
+                state["finished"] = True
+                done.set()
+
+        def fire() -> None:
+            with lock:
+                if state["finished"]:
+                    return
+                state["pending"] += 1
+                tried.append(secondary)
+
+            metrics.inc("rpc_hedged_total", chain=self.chain_name)
+            get_hedge_executor().submit(attempt, secondary)
+
+        def start() -> None:
+            hedge_timer.schedule(primary.p95() or self.hedge_delay, fire)
+            attempt(primary)
+
+        tried.append(primary)
+        get_hedge_executor().submit(start)
+        done.wait()
+
+        if state["error"] is not None and state["response"] is None:
+            raise state["error"]
+        return state["response"]
+
+    def _broadcast(self, params: Any) -> RPCResponse:
+        """Send a raw tx to every endpoint at once and return the first acceptance.
+
+        "Already known" counts as accepted. A rejection is only returned once no endpoint accepted,
+        a lagging endpoint may refuse a tx the others take. The slower sends keep running.
+        """
+
+        method = RPCEndpoint("eth_sendRawTransaction")
+        send = lambda provider: provider.make_request(method, params)  # noqa: E731
+        executor = get_hedge_executor()
+        futures = {
+            executor.submit(self._attempt, method, send, endpoint): endpoint
+            for endpoint in self._candidates(consistent=True)
+        }
+
+        rejection, error = None, None
+        for future in as_completed(futures):
+            try:
+                response = future.result()
+            except Exception as e:
+                error = e
+                continue
+
+            if "error" in response:
+                message = str(response["error"].get("message", "") if isinstance(response["error"], dict) else "")
+                if not any(text in message.lower() for text in ALREADY_KNOWN_MESSAGES):
+                    rejection = rejection or response
+                    continue
+
+                tx_hash = Web3.keccak(hexstr=params[0]).to_0x_hex()
+                response = {"jsonrpc": "2.0", "id": response.get("id"), "result": tx_hash}
+
+            endpoint = futures[future]
+            with self._write_lock:
+                self._write_endpoint = endpoint
+            metrics.inc("tx_broadcast_first_total", chain=self.chain_name, endpoint=endpoint.host)
+
+            return response
+
+        if rejection is not None:
+            return rejection
+        raise error
+
+    def _attempt(self, label: str, send: Callable, endpoint: RpcEndpoint) -> Any:
+        labels = {"chain": self.chain_name, "method": label, "endpoint": endpoint.host}
+        start = time.perf_counter()
+
+        try:
+            with metrics.timer("rpc_request_seconds", **labels) as labels:
+                response = send(endpoint.provider)
+                labels["result"] = "ok" if self._check(response) else "error"
+        except Exception as e:
+            endpoint.failed(self.chain_name, e)
+            raise
+
+        endpoint.succeeded(time.perf_counter() - start)
+
+        return response
+
+    def _check(self, response: Any) -> bool:
+        """False if the response carries a call error, raises EndpointError if the endpoint is the problem."""
+
+        ok = True
+        for item in response if isinstance(response, list) else [response]:
+            error = item.get("error") if isinstance(item, dict) else None
+            if not error:
+                continue
+
+            ok = False
+            message = str(error.get("message", "") if isinstance(error, dict) else error).lower()
+            code = error.get("code") if isinstance(error, dict) else None
+            if code in ENDPOINT_ERROR_CODES or any(text in message for text in ENDPOINT_ERROR_MESSAGES):
+                raise EndpointError(message)
+
+        return ok
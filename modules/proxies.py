@@ -0,0 +1,127 @@
+import random
+import threading
+import time
+from typing import Iterable
+from urllib.parse import urlsplit
+
+import settings
+from modules.logger import logger
+from modules.metrics import metrics
+
+# Responses that point at the proxy rather than the API: proxy auth failure, per-IP rate limit
+PROXY_ERROR_STATUSES = (407, 429)
+
+
+class ProxyHealth:
+    def __init__(self, quarantine: float):
+        self.latency: float | None = None
+        self.error_rate = 0.0
+        self.failures = 0
+        self.in_flight = 0
+        self.quarantine = quarantine
+        self.quarantined_until = 0.0
+
+    def score(self, untested_latency: float) -> float:
+        # Busy and erroring proxies are pushed back, untested ones included
+        latency = self.latency if self.latency is not None else untested_latency
+        return latency * (1 + self.in_flight) * (1 + 4 * self.error_rate)
+
+
+class ProxyManager:
+    """Scores proxies on live HTTP traffic and hands out the fastest healthy one.
+
+    Latency and error rate are exponentially weighted moving averages. A proxy failing
+    `failure_threshold` requests in a row, or whose error rate goes over `max_error_rate`, is
+    quarantined for `quarantine` seconds, twice as long every time it fails again right after.
+    With `sticky`, accounts keep their own proxy and the scores are only tracked.
+    """
+
+    def __init__(self, proxy_settings: dict = settings.PROXY_SETTINGS):
+        self.sticky = proxy_settings["sticky"]
+        self.alpha = proxy_settings["ewma_alpha"]
+        self.failure_threshold = proxy_settings["failure_threshold"]
+        self.max_error_rate = proxy_settings["max_error_rate"]
+        self.min_quarantine = proxy_settings["quarantine"]
+        self.max_quarantine = proxy_settings["max_quarantine"]
+
+        self._proxies: dict[str, ProxyHealth] = {}
+        self._lock = threading.Lock()
+
+    def add(self, proxies: Iterable[str]) -> None:
+        with self._lock:
+            for proxy in proxies:
+                self._proxies.setdefault(proxy, ProxyHealth(self.min_quarantine))
+
+    def acquire(self, preferred: str | None = None) -> str | None:
+        """The proxy for a new session, `preferred` is the one assigned to the account."""
+
+        if not preferred:
+            return preferred
+
+        with self._lock:
+            self._proxies.setdefault(preferred, ProxyHealth(self.min_quarantine))
+
+            if self.sticky:
+                return preferred
+
+            now = time.monotonic()
+            healthy = [(proxy, health) for proxy, health in self._proxies.items() if health.quarantined_until <= now]
+
+            if not healthy:
+                # Never block a session, use the proxy that comes out of quarantine first
+                return min(self._proxies, key=lambda proxy: self._proxies[proxy].quarantined_until)
+
+            # Untested proxies count as a bit faster than the best measured one, so each gets tried
+            measured = [health.latency for _, health in healthy if health.latency is not None]
+            untested_latency = 0.9 * min(measured) if measured else 1.0
+
+            proxy, _ = min(healthy, key=lambda item: (item[1].score(untested_latency), random.random()))
+            return proxy
+
+    def begin(self, proxy: str | None) -> None:
+        if not proxy:
+            return
+
+        with self._lock:
+            self._proxies.setdefault(proxy, ProxyHealth(self.min_quarantine)).in_flight += 1
+
+    def end(self, proxy: str | None, latency: float, ok: bool) -> None:
+        if not proxy:
+            return
+
+        with self._lock:
+            health = self._proxies[proxy]
+            health.in_flight -= 1
+            health.error_rate += self.alpha * ((0.0 if ok else 1.0) - health.error_rate)
+
+            if ok:
+                previous = latency if health.latency is None else health.latency
+                health.latency = previous + self.alpha * (latency - previous)
+                health.failures = 0
+                if health.quarantined_until <= time.monotonic():
+                    health.quarantine = self.min_quarantine
+                return
+
+            health.failures += 1
+            if health.failures >= self.failure_threshold or health.error_rate > self.max_error_rate:
+                self._quarantine(proxy, health)
+
+    def _quarantine(self, proxy: str, health: ProxyHealth) -> None:
+        now = time.monotonic()
+        if health.quarantined_until > now:
+            return
+
+        health.quarantined_until = now + health.quarantine
+        health.failures = 0
+        metrics.inc("proxy_quarantines_total")
+        logger.warning(f"Proxy {self._mask(proxy)} quarantined for {health.quarantine:.0f}s")
+
+        health.quarantine = min(health.quarantine * 2, self.max_quarantine)
+
+    def _mask(self, proxy: str) -> str:
+        # Proxy URLs carry credentials, only the host goes to the logs
+        parts = urlsplit(proxy)
+        return f"{parts.hostname}:{parts.port}" if parts.hostname else "***"
+
+
+proxy_manager = ProxyManager()
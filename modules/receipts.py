@@ -0,0 +1,111 @@
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from hexbytes import HexBytes
+from web3.exceptions import TimeExhausted, Web3Exception
+
+import settings
+from modules.logger import logger
+from modules.pool import get_web3
+from modules.rpc_batch import RpcBatch, to_int
+
+INT_FIELDS = ("status", "gasUsed", "blockNumber", "cumulativeGasUsed", "effectiveGasPrice", "transactionIndex")
+
+
+class TxDropped(Web3Exception):
+    pass
+
+
+class _PendingTx:
+    def __init__(self, tx_hash: str):
+        self.tx_hash = tx_hash
+        self.future: Future = Future()
+        self.last_seen = time.monotonic()
+
+
+class ReceiptTracker:
+    """Confirms every pending tx of one chain with a single poller.
+
+    Each poll fetches the receipts of all pending txs (and whether the node still knows the ones
+    without a receipt) in batched requests, then resolves the futures their senders wait on.
+    A tx the node hasn't known about for `dropped_after` seconds is reported as dropped.
+    """
+
+    def __init__(self, chain_name: str, receipt_settings: dict = settings.RECEIPT_SETTINGS):
+        self.chain_name = chain_name
+        self.w3 = get_web3(chain_name)
+        self.poll_interval = receipt_settings["poll_interval"]
+        self.dropped_after = receipt_settings["dropped_after"]
+        self.batch_size = receipt_settings["batch_size"]
+
+        self._pending: dict[str, _PendingTx] = {}
+        self._lock = threading.Lock()
+        self._poller: threading.Thread | None = None
+
+    def wait(self, tx_hash: HexBytes, timeout: float = 400) -> dict:
+        tx_hash = HexBytes(tx_hash).to_0x_hex()
+
+        with self._lock:
+            pending = self._pending.setdefault(tx_hash, _PendingTx(tx_hash))
+
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._poll, daemon=True)
+                self._poller.start()
+
+        try:
+            return pending.future.result(timeout=timeout)
+        except FutureTimeoutError:
+            raise TimeExhausted(f"Transaction {tx_hash} is not in the chain after {timeout} seconds")
+        finally:
+            with self._lock:
+                self._pending.pop(tx_hash, None)
+
+    def _poll(self) -> None:
+        while True:
+            time.sleep(self.poll_interval)
+
+            with self._lock:
+                if not self._pending:
+                    self._poller = None
+                    return
+                pending = [tx for tx in self._pending.values() if not tx.future.done()]
+
+            for i in range(0, len(pending), self.batch_size):
+                try:
+                    self._check(pending[i : i + self.batch_size])
+                except Exception as e:
+                    logger.debug(f"{self.chain_name.title()} RPC | Receipt poll failed: {e}")
+
+    def _check(self, pending: list[_PendingTx]) -> None:
+        batch = RpcBatch(self.w3, self.chain_name)
+        for tx in pending:
+            batch.add("eth_getTransactionReceipt", [tx.tx_hash], required=False)
+            batch.add("eth_getTransactionByHash", [tx.tx_hash], required=False)
+
+        results = batch.execute()
+        now = time.monotonic()
+
+        for tx, receipt, transaction in zip(pending, results[::2], results[1::2]):
+            if receipt is not None:
+                tx.future.set_result(self._format(receipt))
+            elif transaction is not None:
+                tx.last_seen = now
+            elif now - tx.last_seen > self.dropped_after:
+                tx.future.set_exception(TxDropped(f"Transaction {tx.tx_hash} was dropped"))
+
+    def _format(self, receipt: dict) -> dict:
+        return {key: to_int(value) if key in INT_FIELDS and value else value for key, value in receipt.items()}
+
+
+_trackers: dict[str, ReceiptTracker] = {}
+_trackers_lock = threading.Lock()
+
+
+def get_receipt_tracker(chain_name: str) -> ReceiptTracker:
+    with _trackers_lock:
+        if chain_name not in _trackers:
+            _trackers[chain_name] = ReceiptTracker(chain_name)
+
+        return _trackers[chain_name]
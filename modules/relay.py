@@ -1,29 +1,21 @@
 import random
+from concurrent.futures import Future
 
-from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_fixed
 from web3 import constants
 
 import settings
 from data.const import network_mapping
 from models.network import Network
-from models.responses.quote_response import QuoteResponse
-from modules.http import HttpClient
+from models.responses.quote_response import QuoteResponse, SlimQuoteResponse
+from modules.balances import BalanceService
 from modules.logger import logger
+from modules.pool import get_http_client
+from modules.relay_tracker import relay_tracker
 from modules.utils import wei
 from modules.wallet import Wallet
 
 
-class PendingStatus(Exception):
-    pass
-
-
-class ReceiptNotAvailable(Exception):
-    pass
-
-
 class Relay(Wallet):
-    BASE_URL = "https://api.relay.link"
-
     def __init__(
         self,
         id: str,
@@ -32,9 +24,10 @@ class Relay(Wallet):
         proxy: str = "",
         dest_chain_name: str = "",
         recipient: str | None = None,
+        address: str | None = None,
     ):
-        super().__init__(id, private_key, chain_name, proxy, recipient)
-        self.http = HttpClient(self.proxy, self.BASE_URL)
+        super().__init__(id, private_key, chain_name, proxy, recipient, address)
+        self.http = get_http_client(self.proxy, settings.RELAY_API_URL)
         self.label += "Relay |"
 
         self.src_chain: Network = self.chain
@@ -44,7 +37,7 @@ class Relay(Wallet):
     def amount(self):
         return random.uniform(*settings.REFUEL_SETTINGS["refuel_amount"])
 
-    def _quote(self) -> QuoteResponse:
+    def _quote(self, amount: int) -> SlimQuoteResponse:
         payload = {
             "user": self.address,
             "originChainId": self.chain.id,
@@ -53,69 +46,43 @@ class Relay(Wallet):
             "destinationCurrency": constants.ADDRESS_ZERO,
             "recipient": self.address,
             "tradeType": "EXACT_INPUT",
-            "amount": str(wei(self.amount)),
+            "amount": str(amount),
             "referrer": "relay.link/swap",
             "useExternalLiquidity": False,
             "useDepositAddress": False,
         }
 
         resp = self.http.post("/quote", json=payload)
-        return QuoteResponse(**resp.json())
-
-    def _verify_deposit(self, request_id: str) -> None:
-        endpoint = f"/intents/status?requestId={request_id}"
-        logger.info(f"{self.label} {self.http.base_url}{endpoint}")
-        try:
-            self._check_deposit_status(endpoint)
-        except PendingStatus:
-            raise Exception(f"Deposit not confirmed after max attempts")
-
-    @retry(stop=stop_after_attempt(10), wait=wait_fixed(10), retry=retry_if_exception_type(PendingStatus))
-    def _check_deposit_status(self, endpoint):
-        resp = self.http.get(endpoint)
-        data = resp.json()
+        model = QuoteResponse if settings.STRICT_RESPONSE_MODELS else SlimQuoteResponse
 
-        if "status" in data:
-            status = data["status"]
-
-            if data["status"] == "success":
-                logger.debug(f"{self.label} Status <{status.upper()}>")
-                return
-            else:
-                logger.info(f"{self.label} Status <{status.upper()}>")
-                raise PendingStatus(f"Status is {status}")
+        return model.model_validate_json(resp.content)
 
     def _get_receipt(self, id: str) -> None:
-        endpoint = f"/requests/v2?id={id}"
-        try:
-            self._check_receipt(endpoint)
-        except ReceiptNotAvailable:
-            raise Exception(f"Couldn't get a receipt after max attempts")
-
-    @retry(stop=stop_after_attempt(10), wait=wait_fixed(10), retry=retry_if_exception_type(ReceiptNotAvailable))
-    def _check_receipt(self, endpoint):
-        resp = self.http.get(endpoint)
+        resp = self.http.get(f"/requests/v2?id={id}")
         data = resp.json()
 
-        if "requests" in data:
+        if data.get("requests"):
             amount_usd = float(data["requests"][0]["data"]["metadata"]["currencyOut"]["amountUsd"])
             logger.debug(f"{self.label} ${amount_usd:.2f} in ETH received on {self.dest_chain.name.title()}\n")
-            return
         else:
-            logger.info(f"{self.label} Receipt not available yet")
-            raise ReceiptNotAvailable("Receipt not available")
+            logger.debug(f"{self.label} ETH received on {self.dest_chain.name.title()}\n")
 
-    def refuel(self) -> bool:
-        quote = self._quote()
+    def deposit(self) -> tuple[str, Future] | None:
+        """Send the deposit tx and hand the fill over to the shared status tracker."""
+
+        amount = self.amount
+        quote = self._quote(wei(amount))
 
         if not quote.steps or not quote.steps[0].items:
             raise ValueError("Invalid quote response: missing steps or items")
 
+        (balance_before,) = BalanceService(self.dest_chain.name).get_many([(self.address, "")])
+
         tx_data = quote.steps[0].items[0].data
         tx = {
             "from": self.address,
             "to": self.w3.to_checksum_address(tx_data.to),
-            "nonce": self.w3.eth.get_transaction_count(self.address),
+            "nonce": self.next_nonce(),
             "chainId": self.chain.id,
             "value": int(tx_data.value),
             "data": tx_data.data,
@@ -126,12 +93,28 @@ class Relay(Wallet):
 
         tx_status = self.send_tx(
             tx,
-            tx_label=f"{self.label} Refuel {self.amount:.6f} ETH {self.chain.name.title()} -> {self.dest_chain.name.title()}",
+            tx_label=f"{self.label} Refuel {amount:.6f} ETH {self.chain.name.title()} -> {self.dest_chain.name.title()}",
+        )
+
+        if not tx_status:
+            return None
+
+        request_id = quote.steps[0].requestId
+        time_estimate = quote.details.timeEstimate if quote.details else 0
+        logger.info(f"{self.label} {self.http.base_url}/intents/status?requestId={request_id}")
+
+        fill = relay_tracker.track(
+            request_id, self.address, self.dest_chain.name, balance_before, time_estimate, self.http, self.label
         )
+        return request_id, fill
+
+    def refuel(self) -> bool:
+        deposit = self.deposit()
+        if not deposit:
+            return False
 
-        if tx_status:
-            self._verify_deposit(quote.steps[0].requestId)
-            self._get_receipt(quote.steps[0].requestId)
-            return True
+        request_id, fill = deposit
+        fill.result()
+        self._get_receipt(request_id)
 
-        return False
+        return True
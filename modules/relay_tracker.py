@@ -0,0 +1,165 @@
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+
+import settings
+from modules.balances import BalanceService
+from modules.http import HttpClient
+from modules.logger import logger
+from modules.metrics import metrics
+
+FAILED_STATUSES = ("failure", "refund")
+TRACKER_SETTINGS = settings.RELAY_TRACKER_SETTINGS
+
+
+class _PendingFill:
+    def __init__(
+        self,
+        request_id: str,
+        address: str,
+        dest_chain: str,
+        balance_before: int,
+        time_estimate: int,
+        http: HttpClient,
+        label: str,
+    ):
+        self.request_id = request_id
+        self.address = address
+        self.dest_chain = dest_chain
+        self.balance_before = balance_before
+        self.http = http
+        self.label = label
+        self.future: Future = Future()
+        self.status = ""
+
+        now = time.monotonic()
+        self.started = now
+        self.future.add_done_callback(self._record)
+        self.delay = TRACKER_SETTINGS["min_delay"]
+        self.next_check = now + min(time_estimate, TRACKER_SETTINGS["max_delay"])
+        self.deadline = now + TRACKER_SETTINGS["timeout"]
+
+    def _record(self, future: Future) -> None:
+        result = "failed" if future.exception() else future.result()
+        metrics.observe("relay_fill_seconds", time.monotonic() - self.started, chain=self.dest_chain, result=result)
+
+    def backoff(self, now: float) -> None:
+        self.next_check = now + self.delay
+        self.delay = min(self.delay * TRACKER_SETTINGS["backoff"], TRACKER_SETTINGS["max_delay"])
+
+
+class RelayStatusTracker:
+    """Follows many Relay deposits with one shared polling loop.
+
+    The first check of a deposit happens around the quote's fill time estimate, later ones back off
+    from `min_delay` up to `max_delay`. A deposit counts as filled when Relay reports success, or as soon
+    as the recipient's balance on the destination chain goes up (read for all due deposits in one
+    Multicall3 call per chain).
+    """
+
+    def __init__(self):
+        self._pending: dict[str, _PendingFill] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._poller: threading.Thread | None = None
+
+    def track(
+        self,
+        request_id: str,
+        address: str,
+        dest_chain: str,
+        balance_before: int,
+        time_estimate: int,
+        http: HttpClient,
+        label: str = "",
+    ) -> Future:
+        fill = _PendingFill(request_id, address, dest_chain, balance_before, time_estimate, http, label)
+
+        with self._lock:
+            self._pending[request_id] = fill
+
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._poll, daemon=True)
+                self._poller.start()
+
+        self._wakeup.set()
+        return fill.future
+
+    def _poll(self) -> None:
+        while True:
+            self._wakeup.clear()
+
+            with self._lock:
+                if not self._pending:
+                    self._poller = None
+                    return
+                pending = list(self._pending.values())
+
+            now = time.monotonic()
+            due = [fill for fill in pending if fill.next_check <= now]
+
+            if due:
+                self._check(due)
+
+            with self._lock:
+                for fill in due:
+                    if fill.future.done():
+                        self._pending.pop(fill.request_id, None)
+
+                next_check = min((fill.next_check for fill in self._pending.values()), default=now)
+
+            self._wakeup.wait(max(next_check - time.monotonic(), 0.5))
+
+    def _check(self, due: list[_PendingFill]) -> None:
+        by_chain: dict[str, list[_PendingFill]] = defaultdict(list)
+        for fill in due:
+            by_chain[fill.dest_chain].append(fill)
+
+        for chain, fills in by_chain.items():
+            try:
+                balances = BalanceService(chain).get_many([(fill.address, "") for fill in fills])
+            except Exception as e:
+                logger.debug(f"{chain.title()} RPC | Balance check failed: {e}")
+                continue
+
+            for fill, balance in zip(fills, balances):
+                if balance > fill.balance_before:
+                    logger.debug(f"{fill.label} Balance increased on {chain.title()}")
+                    fill.future.set_result("balance")
+
+        now = time.monotonic()
+        for fill in due:
+            if fill.future.done():
+                continue
+
+            try:
+                self._check_status(fill)
+            except Exception as e:
+                logger.debug(f"{fill.label} Status check failed: {e}")
+
+            if fill.future.done():
+                continue
+
+            if now > fill.deadline:
+                fill.future.set_exception(Exception("Deposit not confirmed before the tracker timeout"))
+            else:
+                fill.backoff(now)
+
+    def _check_status(self, fill: _PendingFill) -> None:
+        resp = fill.http.get(f"/intents/status?requestId={fill.request_id}")
+        status = resp.json().get("status", "")
+        metrics.inc("relay_status_checks_total", chain=fill.dest_chain, status=status or "unknown")
+
+        if status == "success":
+            logger.debug(f"{fill.label} Status <{status.upper()}>")
+            fill.future.set_result(status)
+        elif status in FAILED_STATUSES:
+            fill.future.set_exception(Exception(f"Deposit status is {status}"))
+        elif status != fill.status:
+            logger.info(f"{fill.label} Status <{status.upper()}>")
+
+        fill.status = status
+
+
+relay_tracker = RelayStatusTracker()
@@ -0,0 +1,50 @@
+import time
+
+import settings
+from modules.sqlite_store import SqliteStore
+
+
+class RewardsStore(SqliteStore):
+    """Raw Merkl `/rewards` response bodies per (address, chain_id) with the time they were fetched, kept in SQLite.
+
+    A stored response younger than `ttl` seconds is served instead of calling the API again,
+    `ttl = None` serves stored responses regardless of their age.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS rewards (address TEXT NOT NULL, chain_id INTEGER NOT NULL, "
+        "payload TEXT NOT NULL, fetched_at REAL NOT NULL, PRIMARY KEY (address, chain_id))"
+    )
+
+    def __init__(self, path: str = settings.MERKL_CACHE["path"]):
+        super().__init__(path)
+
+    def get(self, address: str, chain_id: int, ttl: int | None) -> bytes | str | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT payload, fetched_at FROM rewards WHERE address = ? AND chain_id = ?",
+                (address.lower(), chain_id),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        payload, fetched_at = row
+        if ttl is not None and time.time() - fetched_at > ttl:
+            return None
+
+        return payload
+
+    def put(self, address: str, chain_id: int, payload: bytes) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO rewards (address, chain_id, payload, fetched_at) VALUES (?, ?, ?, ?)",
+                (address.lower(), chain_id, payload, time.time()),
+            )
+
+    def invalidate(self, address: str, chain_id: int) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM rewards WHERE address = ? AND chain_id = ?", (address.lower(), chain_id))
+
+
+rewards_store = RewardsStore()
@@ -0,0 +1,81 @@
+import threading
+from collections import defaultdict
+from typing import Any, Callable
+
+from web3 import Web3
+from web3.exceptions import Web3RPCError
+
+import settings
+from modules.logger import logger
+
+
+def to_int(value: str) -> int:
+    return int(value, 16)
+
+
+class RpcBatch:
+    """Sends independent JSON-RPC calls together in a single batch POST.
+
+    Results come back in the order the calls were added, passed through their formatter.
+    Endpoints that reject batches are served one call at a time instead.
+    """
+
+    stats: dict[str, dict[str, int]] = defaultdict(lambda: {"round_trips": 0, "calls": 0})
+    _stats_lock = threading.Lock()
+
+    def __init__(self, w3: Web3, chain_name: str):
+        self.w3 = w3
+        self.chain_name = chain_name
+        self.requests: list[tuple[str, list]] = []
+        self.formatters: list[tuple[Callable[[Any], Any] | None, bool]] = []
+
+    def add(self, method: str, params: list, formatter: Callable[[Any], Any] | None = None, required: bool = True):
+        """Queue a call, if `required` is False an error result is returned as None instead of raised."""
+
+        self.requests.append((method, params))
+        self.formatters.append((formatter, required))
+        return self
+
+    def add_call(self, to: str, data: str, formatter: Callable[[Any], Any] | None = None):
+        return self.add("eth_call", [{"to": to, "data": data}, "latest"], formatter)
+
+    def execute(self) -> list:
+        if not self.requests:
+            return []
+
+        responses = None
+        if settings.RPC_BATCHING and len(self.requests) > 1:
+            try:
+                responses = self.w3.provider.make_batch_request(self.requests)
+                round_trips = 1
+            except Exception as e:
+                # Some public endpoints reject batch bodies outright, retry the calls one by one
+                logger.debug(f"{self.chain_name.title()} RPC | Batch request failed, falling back: {e}")
+
+        if not isinstance(responses, list):
+            responses = [self.w3.provider.make_request(method, params) for method, params in self.requests]
+            round_trips = len(self.requests)
+
+        self._record(round_trips)
+        return [self._format(resp, *fmt) for resp, fmt in zip(responses, self.formatters)]
+
+    def _format(self, response: dict, formatter: Callable[[Any], Any] | None, required: bool) -> Any:
+        if "error" in response or response.get("result") is None:
+            if required:
+                raise Web3RPCError(str(response.get("error", "empty result")), rpc_response=response)
+            return None
+
+        return formatter(response["result"]) if formatter else response["result"]
+
+    def _record(self, round_trips: int) -> None:
+        with self._stats_lock:
+            self.stats[self.chain_name]["round_trips"] += round_trips
+            self.stats[self.chain_name]["calls"] += len(self.requests)
+
+    @classmethod
+    def log_stats(cls) -> None:
+        for chain, stats in cls.stats.items():
+            saved = stats["calls"] - stats["round_trips"]
+            logger.info(
+                f"{chain.title()} RPC | {stats['calls']} calls in {stats['round_trips']} round trips ({saved} saved)"
+            )
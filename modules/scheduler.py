@@ -0,0 +1,91 @@
+import itertools
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from modules.metrics import metrics
+
+
+class Scheduler:
+    """Hands out work slots by start time.
+
+    Accounts and the actions inside them wait for their start time without holding one of the
+    `slots`, so other accounts keep working in the meantime. Slots go to the earliest start time
+    that is due. New accounts are also kept `spacing` seconds apart (a fresh draw for each one)
+    from the last account that actually started, so accounts that waited for a slot or got
+    slots freed at once still start one after the other. Actions resuming after a pause aren't spaced.
+    """
+
+    def __init__(self, slots: int, spacing: tuple[int, int] | list[int] = (0, 0)):
+        self._free = slots
+        self._spacing = spacing
+        self._next_account_at = 0.0
+        self._gap: int | None = None
+        self._waiting: list[tuple[float, int, bool]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def acquire(self, start_at: float, new_account: bool = False) -> None:
+        """Block until `start_at` (time.monotonic) has passed and a slot is free.
+
+        A `new_account` also waits for the spacing since the previous account start.
+        """
+
+        with self._cond:
+            entry = (start_at, next(self._seq), new_account)
+            self._waiting.append(entry)
+
+            while True:
+                ready_at = self._ready_at(entry)
+                wait = ready_at - time.monotonic()
+                if wait <= 0 and self._free and min(self._waiting, key=self._order) == entry:
+                    self._waiting.remove(entry)
+                    self._free -= 1
+                    if new_account:
+                        self._space_next_account()
+                    # The next one in line may be due already
+                    self._cond.notify_all()
+                    return
+
+                self._cond.wait(timeout=wait if wait > 0 else None)
+
+    def release(self) -> None:
+        with self._cond:
+            self._free += 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, start_at: float) -> Iterator[None]:
+        """The slot of a new account for the whole of its flow."""
+
+        self.acquire(start_at, new_account=True)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def pause(self, from_sleep: int, to_sleep: int) -> None:
+        """Drop-in for the action sleep of an account holding a slot: the slot is free while it waits."""
+
+        delay = random.randint(min(from_sleep, to_sleep), max(from_sleep, to_sleep))
+        metrics.observe("sleep_seconds", delay, kind="action")
+
+        self.release()
+        self.acquire(time.monotonic() + delay)
+
+    def _ready_at(self, entry: tuple[float, int, bool]) -> float:
+        start_at, _, new_account = entry
+        return max(start_at, self._next_account_at) if new_account else start_at
+
+    def _order(self, entry: tuple[float, int, bool]) -> tuple[float, float, int]:
+        return self._ready_at(entry), entry[0], entry[1]
+
+    def _space_next_account(self) -> None:
+        # The gap drawn at the previous start is only a wallet sleep once another account follows it
+        if self._gap is not None:
+            metrics.observe("sleep_seconds", self._gap, kind="wallet")
+
+        self._gap = random.randint(*self._spacing)
+        self._next_account_at = time.monotonic() + self._gap
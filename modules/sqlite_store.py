@@ -0,0 +1,37 @@
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class SqliteStore:
+    """Base of the on-disk SQLite stores, creates the file and the `SCHEMA` table on the first connection."""
+
+    SCHEMA: str
+
+    def __init__(self, path: str):
+        self.path = path
+        self._initialized = False
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # One short-lived connection per call, sqlite3 connections can't be shared between threads
+        with self._lock:
+            if not self._initialized:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        conn = sqlite3.connect(self.path, timeout=30)
+
+        try:
+            with self._lock:
+                if not self._initialized:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(self.SCHEMA)
+                    self._initialized = True
+
+            with conn:
+                yield conn
+        finally:
+            conn.close()
@@ -1,23 +1,29 @@
-from eth_account import Account
 from eth_account.datastructures import SignedTransaction
 from eth_account.messages import encode_defunct
 from eth_account.signers.local import LocalAccount
 from eth_typing import ChecksumAddress
-from web3 import HTTPProvider, Web3
+from hexbytes import HexBytes
+from web3 import Web3
 from web3.contract import Contract
 from web3.exceptions import Web3Exception, Web3RPCError
-from web3.middleware import ExtraDataToPOAMiddleware
-from web3.types import TxParams, TxReceipt, Wei
+from web3.types import TxParams, TxReceipt
 
 import settings
 from data.const import ERC20_ABI, network_mapping
 from models.network import Network
+from modules.cache import contract_cache, gas_profiles, token_cache
+from modules.gas import get_gas_oracle
+from modules.keys import get_signer
 from modules.logger import logger
+from modules.metrics import metrics
+from modules.nonce import nonce_manager
+from modules.pool import get_web3
+from modules.receipts import get_receipt_tracker
+from modules.rpc_batch import RpcBatch, to_int
 
 
 class Wallet:
     id: str
-    account: LocalAccount
     address: ChecksumAddress
     proxy: str
     chain: Network
@@ -25,26 +31,35 @@ class Wallet:
     recipient: str | None
 
     def __init__(
-        self, id: str, private_key: str, chain_name: str, proxy: str = "", recipient: str | None = None
+        self,
+        id: str,
+        private_key: str,
+        chain_name: str,
+        proxy: str = "",
+        recipient: str | None = None,
+        address: str | None = None,
     ) -> None:
         self.id = id
-        self.account = Account.from_key(private_key)
-        self.address = self.account.address
+        self.private_key = private_key
+        self.address = address or self.account.address
         self.proxy = proxy
         self.chain = network_mapping[chain_name]
         self.w3 = self.get_web3(chain_name)
         self.recipient = self.w3.to_checksum_address(recipient) if recipient else None
+        # Call shape and gas limit of the txs broadcast but not yet confirmed, for the gas profiles
+        self._gas_shapes: dict[HexBytes, tuple[str | None, int | None]] = {}
 
         if settings.TRUNCATE_ADDRESS_IN_LOGS:
             self.label = f"{id} {self.address[:6]}...{self.address[-4:]} | "
         else:
             self.label = f"{id} {self.address} | "
 
-    def get_web3(self, chain_name: str) -> Web3:
-        web3 = Web3(HTTPProvider(settings.RPC_LIST[chain_name]))
-        web3.middleware_onion.inject(ExtraDataToPOAMiddleware, layer=0)
+    @property
+    def account(self) -> LocalAccount:
+        return get_signer(self.private_key)
 
-        return web3
+    def get_web3(self, chain_name: str) -> Web3:
+        return get_web3(chain_name, self.proxy if settings.USE_PROXY_FOR_RPC else "")
 
     def get_contract(self, contract_address: str, abi: dict | None = None) -> Contract:
         address = Web3.to_checksum_address(contract_address)
@@ -52,13 +67,15 @@ class Wallet:
         if not abi:
             abi = ERC20_ABI
 
-        return self.w3.eth.contract(address=address, abi=abi)
+        # ABIs are module level constants, so their id is stable for the whole run
+        key = (id(self.w3), address, id(abi))
+        return contract_cache.get(key, lambda: self.w3.eth.contract(address=address, abi=abi))
 
     def get_balance(self, token_address: str = "", human: bool = False) -> int | float:
         if token_address:
             token = self.get_contract(token_address)
             balance = token.functions.balanceOf(self.address).call()
-            decimals = token.functions.decimals().call()
+            decimals = self.get_token_metadata(token_address)["decimals"] if human else 18
         else:
             balance = self.w3.eth.get_balance(self.address)
             decimals = 18
@@ -68,41 +85,106 @@ class Wallet:
 
         return balance
 
+    def get_token_metadata(self, token_address: str) -> dict:
+        metadata = token_cache.get(self.chain.id, token_address)
+
+        if metadata is None:
+            metadata = self.get_token_info(token_address)
+            del metadata["balance"]
+
+        return metadata
+
     def get_token_info(self, token_address: str) -> dict:
         token: Contract = self.get_contract(token_address)
-        name: str = token.functions.name().call()
-        symbol: str = token.functions.symbol().call()
-        decimals: int = token.functions.decimals().call()
-        balance: int = token.functions.balanceOf(self.address).call()
+        metadata = token_cache.get(self.chain.id, token.address)
+        batch = RpcBatch(self.w3, self.chain.name)
 
-        return {"name": name, "symbol": symbol, "decimals": decimals, "balance": balance}
+        # name, symbol and decimals never change, only the balance is read when they are cached
+        if metadata is None:
+            batch.add_call(token.address, token.encode_abi("name"), lambda data: self._decode("string", data))
+            batch.add_call(token.address, token.encode_abi("symbol"), lambda data: self._decode("string", data))
+            batch.add_call(token.address, token.encode_abi("decimals"), lambda data: self._decode("uint8", data))
 
-    def get_gas(self, tx: TxParams) -> TxParams:
-        if self.chain.eip_1559:
-            latest_block = self.w3.eth.get_block("latest")
-            base_fee = int(latest_block.get("baseFeePerGas", 0))
-            max_priority_fee = self.w3.eth.max_priority_fee
-            max_fee_per_gas = max_priority_fee + base_fee
+        batch.add_call(
+            token.address, token.encode_abi("balanceOf", [self.address]), lambda data: self._decode("uint256", data)
+        )
+        *results, balance = batch.execute()
 
-            tx["maxFeePerGas"] = Wei(max_fee_per_gas)
-            tx["maxPriorityFeePerGas"] = Wei(max_priority_fee)
+        if metadata is None:
+            metadata = dict(zip(("name", "symbol", "decimals"), results))
+            token_cache.set(self.chain.id, token.address, metadata)
 
-        else:
-            tx["gasPrice"] = self.w3.eth.gas_price
+        return {**metadata, "balance": balance}
 
-        tx["gas"] = self.w3.eth.estimate_gas(tx)
+    def _decode(self, abi_type: str, data: str):
+        return self.w3.codec.decode([abi_type], bytes.fromhex(data.removeprefix("0x")))[0]
+
+    def _add_gas_requests(self, batch: RpcBatch, tx: TxParams) -> RpcBatch:
+        estimate_tx = {"from": tx["from"], "value": hex(tx.get("value", 0))}
+        if "to" in tx:
+            estimate_tx["to"] = tx["to"]
+        if "data" in tx:
+            estimate_tx["data"] = tx["data"]
+
+        return batch.add("eth_estimateGas", [estimate_tx], to_int)
+
+    def _apply_gas(self, tx: TxParams, results: list) -> TxParams:
+        # Fee data comes from the chain's shared oracle, only the gas limit is per tx
+        (gas,) = results
+        tx.update(get_gas_oracle(self.chain.name).get_fees())
+
+        tx["gas"] = gas
         return tx
 
-    def get_tx_params(self, value: int = 0, get_gas: bool = False, **kwargs) -> TxParams:
+    def _profiled_gas(self, tx: TxParams) -> int | None:
+        gas = gas_profiles.limit(gas_profiles.key(self.chain.id, tx))
+        metrics.inc("gas_limit_total", chain=self.chain.name, source="profile" if gas else "estimate")
+
+        return gas
+
+    def get_gas(self, tx: TxParams) -> TxParams:
+        gas = self._profiled_gas(tx)
+        if gas:
+            return self._apply_gas(tx, [gas])
+
+        results = self._add_gas_requests(RpcBatch(self.w3, self.chain.name), tx).execute()
+        return self._apply_gas(tx, results)
+
+    def get_tx_params(self, value: int = 0, get_gas: bool = False, use_gas_profile: bool = True, **kwargs) -> TxParams:
+        """Params of a tx from this wallet. Calls that can revert pass `use_gas_profile=False`,
+        eth_estimateGas is then their check before anything is broadcast."""
+
         params = {
             "chainId": self.chain.id,
             "from": self.address,
-            "nonce": self.w3.eth.get_transaction_count(self.address),
             "value": value,
             **kwargs,
         }
 
-        return self.get_gas(TxParams(**params)) if get_gas else TxParams(**params)
+        # The nonce and the gas estimate are independent of each other, so they share one round trip.
+        # Known call shapes take their gas limit from the profiles and skip the estimate
+        batch = RpcBatch(self.w3, self.chain.name)
+        fetch_nonce = not nonce_manager.is_known(self.chain.id, self.address)
+        if fetch_nonce:
+            batch.add("eth_getTransactionCount", [self.address, "pending"], to_int)
+
+        gas = self._profiled_gas(params) if get_gas and use_gas_profile else None
+        if get_gas and not gas:
+            self._add_gas_requests(batch, params)
+
+        results = batch.execute()
+        params["nonce"] = self.next_nonce(results.pop(0) if fetch_nonce else None)
+
+        if not get_gas:
+            return TxParams(**params)
+
+        return self._apply_gas(TxParams(**params), [gas] if gas else results)
+
+    def next_nonce(self, chain_nonce: int | None = None) -> int:
+        if chain_nonce is None and not nonce_manager.is_known(self.chain.id, self.address):
+            chain_nonce = self.w3.eth.get_transaction_count(self.address, "pending")
+
+        return nonce_manager.take(self.chain.id, self.address, chain_nonce)
 
     def sign_message(self, message: str) -> str:
         message_encoded = encode_defunct(text=message)
@@ -111,21 +193,30 @@ class Wallet:
         return "0x" + signed_message.signature.hex()
 
     def sign_tx(self, tx: TxParams) -> SignedTransaction:
-        return self.w3.eth.account.sign_transaction(tx, self.account.key)
+        return self.account.sign_transaction(tx)
 
     def send_tx(self, tx: TxParams, tx_label: str = "") -> str | bool:
+        tx_hash = self.broadcast_tx(tx, tx_label)
+        if not tx_hash:
+            return False
+
+        return self.confirm_tx(tx_hash, tx_label)
+
+    def broadcast_tx(self, tx: TxParams, tx_label: str = "") -> HexBytes | bool:
+        with metrics.timer("tx_broadcast_seconds", chain=self.chain.name) as labels:
+            tx_hash = self._broadcast_tx(tx, tx_label)
+            labels["result"] = "ok" if tx_hash else "failed"
+
+        return tx_hash
+
+    def _broadcast_tx(self, tx: TxParams, tx_label: str = "") -> HexBytes | bool:
         try:
             signed_tx = self.sign_tx(tx)
             tx_hash = self.w3.eth.send_raw_transaction(signed_tx.raw_transaction)
             logger.info(f"{tx_label} | {self.chain.explorer}/tx/0x{tx_hash.hex()}")
+            self._gas_shapes[tx_hash] = (gas_profiles.key(self.chain.id, tx), tx.get("gas"))
 
-            tx_receipt: TxReceipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=400)
-
-            if tx_receipt["status"]:
-                logger.success(f"{tx_label} | Tx confirmed \n")
-                return "00x" + tx_hash.hex()
-
-            raise Web3Exception(f"Tx Failed \n")
+            return tx_hash
 
         except Web3RPCError as err:
             error_message = str(err).lower()
@@ -134,27 +225,66 @@ class Wallet:
                 logger.error(f"{tx_label} | Insufficient funds \n")
             elif "already known" in error_message:
                 logger.warning(f"{tx_label} | Transaction already in mempool \n")
-                return getattr(self, "tx_hash", True)
+                self._gas_shapes[signed_tx.hash] = (gas_profiles.key(self.chain.id, tx), tx.get("gas"))
+                return signed_tx.hash
             else:
                 logger.error(f"{tx_label} | RPC Error: {err} \n")
 
-            return False
+        except Web3Exception as err:
+            logger.error(f"{tx_label} | Web3 Error: {err} \n")
+
+        nonce_manager.resync(self.chain.id, self.address)
+        return False
+
+    def confirm_tx(self, tx_hash: HexBytes, tx_label: str = "") -> str | bool:
+        with metrics.timer("tx_confirm_seconds", chain=self.chain.name) as labels:
+            confirmed = self._confirm_tx(tx_hash, tx_label)
+            labels["result"] = "ok" if confirmed else "failed"
+
+        return confirmed
+
+    def _confirm_tx(self, tx_hash: HexBytes, tx_label: str = "") -> str | bool:
+        try:
+            tx_receipt: TxReceipt = get_receipt_tracker(self.chain.name).wait(tx_hash, timeout=400)
+            self._learn_gas(tx_hash, tx_receipt)
+
+            if tx_receipt["status"]:
+                logger.success(f"{tx_label} | Tx confirmed \n")
+                return "0x" + tx_hash.hex()
+
+            raise Web3Exception(f"Tx Failed \n")
 
         except Web3Exception as err:
             logger.error(f"{tx_label} | Web3 Error: {err} \n")
-            return False
+
+        nonce_manager.resync(self.chain.id, self.address)
+        return False
+
+    def _learn_gas(self, tx_hash: HexBytes, receipt: TxReceipt) -> None:
+        key, gas = self._gas_shapes.pop(tx_hash, (None, None))
+
+        if receipt["status"]:
+            gas_profiles.learn(key, receipt["gasUsed"])
+        elif gas and receipt["gasUsed"] >= gas * 0.95:
+            # Most likely out of gas, estimate this shape again from now on
+            gas_profiles.forget(key)
+
+    def get_transfer_tx(self, token_address: str, amount: int, get_gas: bool = False) -> TxParams:
+        token_contract = self.get_contract(token_address)
+        data = token_contract.encode_abi("transfer", [self.recipient, amount])
+
+        return self.get_tx_params(to=token_contract.address, data=data, get_gas=get_gas)
+
+    def transfer_label(self, token: dict, amount: int) -> str:
+        return f"{self.label} Transfer {amount / 10**token['decimals']:.0f} {token['symbol']} to {self.recipient}"
 
     def transfer_token(self, token_address: str, amount: int | None = None) -> bool:
         if not self.recipient:
             return False
 
-        token_contract = self.get_contract(token_address)
         token = self.get_token_info(token_address)
 
         transfer_amount = amount if amount else token["balance"]
-        tx = token_contract.functions.transfer(self.recipient, transfer_amount).build_transaction(self.get_tx_params())
+        tx = self.get_transfer_tx(token_address, transfer_amount, get_gas=True)
 
-        return self.send_tx(
-            tx,
-            f"{self.label} Transfer {transfer_amount / 10**token['decimals']:.0f} {token['symbol']} to {self.recipient}",
-        )
+        return self.send_tx(tx, self.transfer_label(token, transfer_amount))
@@ -2,23 +2,142 @@
 #                           General Settings                           #
 ########################################################################
 
+# A chain takes one endpoint or a list of them
 RPC_LIST = {
-    "ethereum": "https://eth.drpc.org",
-    "arbitrum": "https://arbitrum.meowrpc.com",
+    "ethereum": ["https://eth.drpc.org", "https://ethereum-rpc.publicnode.com"],
+    "arbitrum": ["https://arbitrum.meowrpc.com", "https://arb1.arbitrum.io/rpc"],
     "base": "https://mainnet.base.org",
     "optimism": "https://mainnet.optimism.io",
     "linea": "https://rpc.linea.build",
     "swell": "https://swell-mainnet.alt.technology",
 }
 
+# API endpoints, the offline benchmarks point these at local mock servers
+MERKL_API_URL = "https://api.merkl.xyz"
+MERKL_APP_URL = "https://app.merkl.xyz"
+RELAY_API_URL = "https://api.relay.link"
+
 USE_PROXY = False
+# Also route RPC traffic through the account's proxy
+USE_PROXY_FOR_RPC = False
+# Proxies are scored on live HTTP traffic (latency and error rate EWMA). Failing ones are
+# quarantined for `quarantine` seconds, doubling up to `max_quarantine` while they keep failing.
+# Each new session gets the fastest healthy proxy, with `sticky` accounts keep the proxy they were given
+PROXY_SETTINGS = {
+    "sticky": False,
+    "ewma_alpha": 0.3,
+    "failure_threshold": 3,
+    "max_error_rate": 0.6,
+    "quarantine": 30,
+    "max_quarantine": 600,
+}
 SHUFFLE_KEYS = False
+# Keys are read as a stream and shuffled within a window of this many, None shuffles the whole file in memory
+SHUFFLE_WINDOW = 10_000
+
+KEYS_PATH = "input_data/keys.txt"
+PROXIES_PATH = "input_data/proxies.txt"
+RECIPIENTS_PATH = "input_data/recipients.txt"
+
+# A warning is logged when `python main.py <action>` takes longer than this to get going
+STARTUP_BUDGET_MS = 3000
 
+# Number of accounts processed at the same time
+CONCURRENCY = 5
+# Accounts are read from the input files, and with plan_ahead refuel-planned, this many at a time
+DISPATCH_WINDOW = 1000
+# Never run two accounts sharing the same proxy at the same time
+ONE_SLOT_PER_PROXY = False
+
+# Accounts start this many seconds apart, one after the other. Accounts waiting for their start
+# or between actions don't hold a CONCURRENCY slot, up to MAX_ACCOUNTS_IN_FLIGHT are started at a time
 SLEEP_BETWEEN_WALLETS = [10, 20]
 SLEEP_BETWEEN_ACTIONS = [10, 20]
+MAX_ACCOUNTS_IN_FLIGHT = 20
 
 TRUNCATE_ADDRESS_IN_LOGS = False
 
+# Token name/symbol/decimals are cached on disk, built contract objects in memory
+TOKEN_CACHE_PATH = "cache/tokens.json"
+CONTRACT_CACHE_SIZE = 256
+
+# Addresses are derived from the keys once when they are loaded, in batches growing up to
+# `batch_size` and in a process pool from `process_pool_min` keys on. `index_path` keeps a
+# key fingerprint -> address index in SQLite so later runs skip derivation entirely, None disables it.
+# Signers of the last `signer_cache_size` keys used are kept for signing
+KEY_DERIVATION = {
+    "batch_size": 10_000,
+    "process_pool_min": 2000,
+    "index_path": "cache/addresses.sqlite",
+    "signer_cache_size": 256,
+}
+
+# Validate Merkl and Relay responses against the full API models instead of only the fields in use.
+# Slower, but a changed API shape shows up as a validation error
+STRICT_RESPONSE_MODELS = False
+
+# Latency histograms and call counters of RPC, HTTP APIs, txs, bridge fills and sleeps.
+# `export` ("json", "prometheus" or None) writes them to `path` at the end of a run,
+# `live_interval` logs a one-line summary every that many seconds (None: off)
+METRICS = {
+    "export": "json",
+    "path": "metrics/last_run.json",
+    "live_interval": None,
+}
+
+# With several endpoints per chain, reads go to the one with the lowest latency EWMA and fail over
+# on errors and rate limits, benching the endpoint for `cooldown` seconds (doubling up to `max_cooldown`).
+# With `hedge_reads`, a read slower than the endpoint's p95 (`hedge_delay` until it is known) is
+# also sent to the next endpoint, the first answer wins. Both run on `hedge_workers` threads, enough
+# for every read in flight and its hedge. Txs and nonces always go to the same endpoint until it fails.
+# With `broadcast_to_all`, signed txs are sent to all endpoints of the chain at once instead
+RPC_SETTINGS = {
+    "ewma_alpha": 0.3,
+    "cooldown": 10,
+    "max_cooldown": 300,
+    "hedge_reads": True,
+    "hedge_delay": 1.0,
+    "hedge_workers": 64,
+    "broadcast_to_all": True,
+}
+
+# Send independent RPC calls (nonce, fees, gas estimate...) as one JSON-RPC batch
+RPC_BATCHING = True
+
+# Fee data is fetched once per chain every `cache_ttl` seconds and shared by all accounts.
+# With `priority_fee_percentile` set, the priority fee is the median of that percentile over
+# the last `fee_history_blocks` blocks, otherwise it comes from eth_maxPriorityFeePerGas
+GAS_SETTINGS = {
+    "cache_ttl": 2,
+    "priority_fee_percentile": None,
+    "base_fee_multiplier": 1.0,
+    "fee_history_blocks": 5,
+}
+
+# One poller per chain confirms all pending txs, a tx unknown to the node for
+# `dropped_after` seconds is reported as dropped
+RECEIPT_SETTINGS = {
+    "poll_interval": 2,
+    "dropped_after": 60,
+    "batch_size": 100,
+}
+
+# Relay fills are first checked around the quote's time estimate, then with a backoff from
+# `min_delay` to `max_delay` seconds, and given up on after `timeout` seconds
+RELAY_TRACKER_SETTINGS = {
+    "min_delay": 1,
+    "max_delay": 15,
+    "backoff": 1.5,
+    "timeout": 600,
+}
+
+# Max number of balance reads packed into a single Multicall3 aggregate3 call
+MULTICALL_BATCH_SIZE = 500
+
+# Shared Web3 providers and HTTP sessions, keyed by (chain, proxy)
+POOL_MAX_SIZE = 64
+POOL_IDLE_TIMEOUT = 300
+
 
 ########################################################################
 #                           Action Settings                            #
@@ -26,8 +145,52 @@ TRUNCATE_ADDRESS_IN_LOGS = False
 
 SEND_TO_EXCHANGE = True
 
+# Merkl rewards responses are stored in SQLite. Read-only checks reuse them for `ttl` seconds
+# (None: no expiry). Proofs change when Merkl publishes a new root, so claims only reuse a
+# response younger than `claim_ttl` seconds (0: always fetched), e.g. the one the refuel planner just read
+MERKL_CACHE = {
+    "path": "cache/merkl.sqlite",
+    "ttl": 3600,
+    "claim_ttl": 60,
+    "force_refresh": False,
+}
+
+# claim_swell records the stage each account reached (refueled, claimed, transferred, done).
+# With `resume` (or --resume), a restarted run skips finished accounts, otherwise the journal starts empty.
+# Leave it off for regular runs, a resumed run also skips wallets that got new rewards since they finished
+RUN_JOURNAL = {
+    "path": "cache/claim_journal.jsonl",
+    "resume": False,
+}
+
+# Chains scanned for Merkl rewards, all unclaimed tokens of a chain are claimed in one tx.
+# Only Swell is refueled, other chains need gas on the wallet already
+MERKL_CHAINS = ["swell"]
+
+# Claim calldata is encoded locally, set to True to also compare it with app.merkl.xyz
+VERIFY_MERKL_CALLDATA = False
+
+# Broadcast the SWELL transfer right after the claim instead of waiting for the claim to confirm
+PIPELINE_CLAIM_TRANSFER = True
+# Gas limit for the pipelined transfer until a transfer of the same shape has a gas profile,
+# it can't be estimated before the claim lands
+PIPELINED_TRANSFER_GAS = 100_000
+
+# Gas limits are learned from confirmed receipts per contract, function and calldata size. After
+# `min_samples` txs of a shape, the highest gasUsed plus `margin` is used instead of eth_estimateGas.
+# The margin covers the first transfer to a fresh recipient, which costs more than later ones.
+# Merkl claims can revert on outdated proofs and are always estimated
+GAS_PROFILES = {
+    "path": "cache/gas_profiles.json",
+    "margin": 0.6,
+    "min_samples": 3,
+}
+
 REFUEL_SETTINGS = {
     "min_balance": 0.000055,
     "chains": ["optimism", "base", "arbitrum", "linea"],
     "refuel_amount": [0.00005, 0.0001],
+    # Scan each window of DISPATCH_WINDOW accounts before claiming and dispatch every needed refuel up front
+    "plan_ahead": True,
+    "parallel_deposits": 20,
 }